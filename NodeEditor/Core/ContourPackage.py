@@ -0,0 +1,67 @@
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from NodeEditor.Core.NodePackage import NodePackage, _read_only
+
+
+@dataclass
+class Contour:
+    points: np.ndarray  # (N, 1, 2) int32, as returned by cv2.findContours
+    area: float
+    bbox: tuple[int, int, int, int]  # x, y, w, h
+    moments: dict[str, float]
+
+    @classmethod
+    def from_points(cls, points: np.ndarray) -> "Contour":
+        points = np.ascontiguousarray(points, dtype=np.int32).reshape(-1, 1, 2)
+        points.flags.writeable = False
+        x, y, w, h = cv2.boundingRect(points)
+        return cls(points, float(cv2.contourArea(points)), (x, y, w, h), cv2.moments(points))
+
+    @property
+    def centroid(self) -> tuple[float, float] | None:
+        m00 = self.moments["m00"]
+        if m00 == 0:
+            return None
+        return self.moments["m10"] / m00, self.moments["m01"] / m00
+
+
+@dataclass
+class ContourPackage(NodePackage):
+    """
+    Contours as polygons instead of pixels.
+
+    The mask is only drawn the first time `image_or_mask` is read, so nodes that work on the
+    polygons never pay for a full frame. Like other cached results it is shared by every copy
+    of the package and read-only, copy it before drawing on it. `contours()` returns the
+    polygons directly instead of tracing the mask again.
+    """
+    polygons: list[Contour] = field(default_factory=list)
+    frame_shape: tuple[int, int] = (1, 1)
+    thickness: int = -1  # Used when rasterising, -1 fills the polygons
+
+    def __post_init__(self):
+        # Leave image_or_mask unset so __getattr__ rasterises it on demand
+        self.__dict__.pop("image_or_mask", None)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "image_or_mask":
+            return self._derived.get("raster", lambda: _read_only(self.rasterise()))
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def rasterise(self, shape: tuple[int, int] | None = None) -> MatLike:
+        mask = np.zeros(shape or self.frame_shape, dtype=np.uint8)
+        if self.polygons:
+            cv2.drawContours(mask, [c.points for c in self.polygons], -1, 255, self.thickness) # type: ignore
+        return mask
+
+    def contours(self, mode: int = cv2.RETR_EXTERNAL, method: int = cv2.CHAIN_APPROX_SIMPLE,
+                 threshold: int | None = None) -> tuple[Sequence[MatLike], MatLike | None]:
+        if "image_or_mask" in self.__dict__:
+            # The pixels were replaced, they no longer match the polygons
+            return super().contours(mode, method, threshold)
+        return tuple(c.points for c in self.polygons), None
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+import cv2
+
+try:
+    from threadpoolctl import ThreadpoolController
+except ImportError:
+    ThreadpoolController = None
+
+
+def _available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+class Governor:
+    """
+    Splits the CPU between nodes running side by side and the threads each of them uses
+    internally.
+
+    OpenCV (and numpy's BLAS, if threadpoolctl is installed) spread a single call over every
+    core, while the graph runs several nodes at once. Each node execution holds a slot, at most
+    `max_parallel` run at the same time and the library thread count is set to the cores left
+    per runnable node, so one busy branch still gets the whole machine and many branches don't
+    fight over it.
+    """
+
+    def __init__(self, cores: int | None = None, max_parallel: int | None = None, window: float = 2.0) -> None:
+        self.cores = cores or _available_cores()
+        self.max_parallel = max_parallel or self.cores
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_parallel)
+        self._running = 0
+        self._waiting = 0
+        self._threads = 0
+        self._controller = ThreadpoolController() if ThreadpoolController is not None else None
+
+        # Utilisation is measured CPU time over the last `window` seconds, from (wall, cpu) samples
+        # taken whenever stats are read, so several readers don't disturb each other
+        self.window = window
+        self._samples: deque[tuple[float, float]] = deque([(time.perf_counter(), time.process_time())])
+        self._executions = 0
+        self._wait_time = 0.0
+        self._peak_running = 0
+        self._rebalance()
+
+    def configure(self, cores: int | None = None, max_parallel: int | None = None):
+        """Change the budget, slots already held are kept until released."""
+        with self._lock:
+            if cores is not None:
+                self.cores = max(1, cores)
+            self.max_parallel = max(1, max_parallel or self.cores)
+            self._slots = threading.BoundedSemaphore(self.max_parallel)
+            self._rebalance()
+
+    @property
+    def threads(self) -> int:
+        """Library threads each running node may use right now."""
+        return self._threads
+
+    @contextmanager
+    def slot(self) -> Iterator[int]:
+        """Hold one execution slot, yields the number of library threads the holder may use."""
+        with self._lock:
+            self._waiting += 1
+            self._rebalance()
+        slots = self._slots
+        start = time.perf_counter()
+        slots.acquire()
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+            self._executions += 1
+            self._wait_time += time.perf_counter() - start
+            self._peak_running = max(self._peak_running, self._running)
+            self._rebalance()
+            threads = self._threads
+        try:
+            yield threads
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._rebalance()
+            slots.release()
+
+    def _rebalance(self):
+        # Runnable nodes share the cores, waiting ones count too since they start as soon as a slot frees
+        runnable = min(self._running + self._waiting, self.max_parallel)
+        threads = max(1, self.cores // max(1, runnable))
+        if threads == self._threads:
+            return
+        self._threads = threads
+        cv2.setNumThreads(threads)
+        if self._controller is not None:
+            self._controller.limit(limits=threads)
+
+    def _sample(self) -> tuple[float, float]:
+        # Returns the wall and CPU seconds since the oldest sample still inside the window
+        now = (time.perf_counter(), time.process_time())
+        self._samples.append(now)
+        while len(self._samples) > 2 and now[0] - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+        start = self._samples[0]
+        return now[0] - start[0], now[1] - start[1]
+
+    def stats(self) -> dict:
+        """Current load and the process's CPU use over roughly the last `window` seconds."""
+        with self._lock:
+            wall, cpu = self._sample()
+            return {
+                "cores": self.cores,
+                "max_parallel": self.max_parallel,
+                "running": self._running,
+                "waiting": self._waiting,
+                "threads_per_node": self._threads,
+                "utilisation": min(1.0, cpu / (wall * self.cores)) if wall > 0 else 0.0,
+                "executions": self._executions,
+                "mean_wait_ms": self._wait_time / self._executions * 1000 if self._executions else 0.0,
+                "peak_running": self._peak_running,
+            }
+
+
+governor = Governor()
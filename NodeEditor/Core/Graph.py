@@ -0,0 +1,307 @@
+import asyncio
+import concurrent.futures as future
+import copy
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Iterable
+
+import dearpygui.dearpygui as dpg
+
+from NodeEditor.Core.Governor import governor
+from NodeEditor.Core.Node import ExecutionCancelled, Node
+from NodeEditor.Core.NodePackage import NodePackage
+from NodeEditor.Core.NodeRegistry import NodeRegistry
+
+_registries: dict[str, NodeRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def _registry(nodes_dir: str) -> NodeRegistry:
+    with _registries_lock:
+        if nodes_dir not in _registries:
+            _registries[nodes_dir] = NodeRegistry(nodes_dir)
+        return _registries[nodes_dir]
+
+
+@dataclass
+class GraphResult:
+    outputs: dict[str, list[NodePackage]] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0  # seconds
+
+
+class Graph:
+    """
+    A workspace executed without the editor.
+
+    Nodes are created from the workspace dict the editor saves and run once per `run_sync`
+    call in topological order on the calling thread. Nodes are composed into a hidden node
+    editor, so their UI items exist and their dpg calls work without a viewport.
+
+    Inputs and results are keyed by node name, the node's label with a number appended when
+    several nodes share it. Results hold the outputs of every node nothing reads, or the
+    inputs for display nodes such as Imshow. A graph keeps node state between runs (temporal
+    filters, fitted models), so one instance must not run on two threads at once.
+    """
+
+    def __init__(self, workspace: dict, nodes_dir: str = "Nodes") -> None:
+        registry = _registry(nodes_dir)
+        self.nodes: list[Node] = []
+        self.names: list[str] = []
+
+        types = ["any"] + [t for t in registry.port_types() if t != "any"]
+        self._window = dpg.add_window(show=False)
+        self._editor = dpg.add_node_editor(parent=self._window)
+
+        for node_data in workspace["nodes"]:
+            spec = registry.get(node_data["node_class"])
+            if spec is None:
+                raise ValueError(f"Node class '{node_data['node_class']}' not found")
+            node = spec.create()
+            node.headless = True
+            node._compose(self._editor, types)
+            try:
+                node.on_load(node_data.get("state", {}))
+            except Exception as e:
+                # e.g. a file that only exists on another machine, the node can still be fed through inputs
+                print(f"Error loading '{node.label}':", e)
+            self.nodes.append(node)
+
+        labels = [node.label for node in self.nodes]
+        for idx, label in enumerate(labels):
+            count = labels[:idx + 1].count(label)
+            self.names.append(label if labels.count(label) == 1 else f"{label} {count}")
+
+        for link in workspace["links"]:
+            start = self.nodes[link["start_node_index"]]
+            end = self.nodes[link["end_node_index"]]
+            start.outputs[link["start_output_idx"]].connected_nodes.append(end)
+            end.inputs[link["end_input_idx"]].connected_node = start
+            end.inputs[link["end_input_idx"]].connected_output_idx = link["start_output_idx"]
+
+        self._index = {id(node): idx for idx, node in enumerate(self.nodes)}
+        self.order = self._topological_order()
+        self.sources = [name for name, node in zip(self.names, self.nodes)
+                        if all(node_input.connected_node is None for node_input in node.inputs)]
+        self.terminals = [name for name, node in zip(self.names, self.nodes)
+                          if not any(output.connected_nodes for output in node.outputs)]
+
+    @classmethod
+    def load(cls, file_path: str = "workspace.json", nodes_dir: str = "Nodes") -> "Graph":
+        with open(file_path, "r") as f:
+            return cls(json.load(f), nodes_dir)
+
+    def _topological_order(self) -> list[int]:
+        pending = [sum(node_input.connected_node is not None for node_input in node.inputs) for node in self.nodes]
+        ready = [idx for idx, count in enumerate(pending) if count == 0]
+        order = []
+        while ready:
+            idx = ready.pop(0)
+            order.append(idx)
+            for output in self.nodes[idx].outputs:
+                for consumer in output.connected_nodes:
+                    consumer_idx = self._index[id(consumer)]
+                    pending[consumer_idx] -= 1
+                    if pending[consumer_idx] == 0:
+                        ready.append(consumer_idx)
+        if len(order) != len(self.nodes):
+            raise ValueError("The workspace contains a cycle")
+        return order
+
+    def index(self, key: int | str) -> int:
+        if isinstance(key, int):
+            return key
+        if key not in self.names:
+            raise KeyError(f"No node named '{key}', nodes are {self.names}")
+        return self.names.index(key)
+
+    def _normalise_inputs(self, inputs: Any) -> dict[int, NodePackage]:
+        if inputs is None:
+            return {}
+        if not isinstance(inputs, dict):
+            # A bare image goes to the only source node
+            if len(self.sources) != 1:
+                raise ValueError(f"Name the node to feed, the graph has the sources {self.sources}")
+            inputs = {self.sources[0]: inputs}
+        return {
+            self.index(key): value if isinstance(value, NodePackage) else NodePackage(image_or_mask=value)
+            for key, value in inputs.items()
+        }
+
+    def run_sync(self, inputs: Any = None) -> GraphResult:
+        """
+        Execute the graph once. `inputs` maps node names (or indices) to images or packages
+        that replace the outputs of those nodes, a bare image feeds the only source node.
+        """
+        return self.run_batch([inputs])[0]
+
+    def run_batch(self, batch: list[Any]) -> list[GraphResult]:
+        """
+        Execute the graph once per item of `batch`, each given like the inputs of `run_sync`.
+
+        The graph is walked once, every node runs for all items in a row under one governor
+        slot before the next node starts, and nodes with state see the items in order. The
+        elapsed time of each result is that of the whole batch.
+        """
+        injected = [self._normalise_inputs(inputs) for inputs in batch]
+        results = [GraphResult() for _ in batch]
+        start = time.perf_counter()
+        produced: list[dict[int, list[NodePackage] | None]] = [{} for _ in batch]
+
+        for idx in self.order:
+            node = self.nodes[idx]
+            pending = []
+            for item, item_injected in enumerate(injected):
+                if idx in item_injected:
+                    produced[item][idx] = [item_injected[idx]] * max(1, len(node.outputs))
+                    continue
+
+                node_inputs = []
+                for node_input in node.inputs:
+                    data = node_input.latest_data
+                    if node_input.connected_node is not None:
+                        upstream = produced[item].get(self._index[id(node_input.connected_node)])
+                        data = upstream[node_input.connected_output_idx or 0] if upstream else None
+                    node_inputs.append(data)
+
+                if any(data is None and not node_input.optional for data, node_input in zip(node_inputs, node.inputs)):
+                    # An upstream node failed or a required input is unconnected
+                    produced[item][idx] = None
+                else:
+                    pending.append((item, node_inputs))
+
+            if pending:
+                for item, outputs in self._execute(idx, pending, results):
+                    produced[item][idx] = outputs
+
+        elapsed = time.perf_counter() - start
+        for item, result in enumerate(results):
+            for name in self.terminals:
+                packages = produced[item].get(self.names.index(name))
+                if packages is not None:
+                    result.outputs[name] = packages
+            result.elapsed = elapsed
+        return results
+
+    def _execute(self, idx: int, pending: list[tuple[int, list[NodePackage]]],
+                 results: list[GraphResult]) -> list[tuple[int, list[NodePackage] | None]]:
+        node = self.nodes[idx]
+        name = self.names[idx]
+        if node.is_sink and not node.outputs:
+            # Nothing to show headless, report what the display was sent instead
+            return list(pending)
+
+        # Results are read from every output of a terminal node, none may be skipped
+        terminal = name in self.terminals
+        if terminal:
+            node._run_state.demand_all = True
+        produced = []
+        try:
+            with governor.slot():
+                for item, inputs in pending:
+                    node._keep_error = False
+                    try:
+                        outputs = node.execute(copy.deepcopy(inputs))
+                    except ExecutionCancelled:
+                        outputs = None
+                    except Exception as e:
+                        results[item].errors[name] = str(e)
+                        outputs = None
+                    else:
+                        if node._keep_error:
+                            # The node reported a problem through on_error
+                            results[item].errors[name] = dpg.get_value(node._error_text_id) or "Error"
+                    produced.append((item, outputs))
+        finally:
+            if terminal:
+                del node._run_state.demand_all
+        return produced
+
+    def close(self):
+        for node in self.nodes:
+            node.on_delete()
+        if dpg.does_item_exist(self._window):
+            dpg.delete_item(self._window)
+
+
+async def _iterate(source: Iterable | AsyncIterable) -> AsyncIterator:
+    if hasattr(source, "__aiter__"):
+        async for item in source:  # type: ignore
+            yield item
+        return
+    # Reading a blocking source (a camera, a video) must not stall the event loop
+    iterator = iter(source)  # type: ignore
+    done = object()
+    while (item := await asyncio.to_thread(next, iterator, done)) is not done:
+        yield item
+
+
+class AsyncGraph:
+    """
+    asyncio front end for `Graph`.
+
+    Holds `replicas` copies of the workspace and a worker thread for each, so as many runs
+    execute at once while the event loop stays free. `await run(inputs)` takes the first free
+    replica, `stream(source)` keeps one replica for the whole stream so nodes with state see
+    the frames in order.
+    """
+
+    def __init__(self, workspace: dict, replicas: int = 2, nodes_dir: str = "Nodes") -> None:
+        self.replicas = [Graph(workspace, nodes_dir) for _ in range(max(1, replicas))]
+        self._executor = future.ThreadPoolExecutor(max_workers=len(self.replicas), thread_name_prefix="graph")
+        self._free: asyncio.Queue[Graph] | None = None
+
+    @classmethod
+    def load(cls, file_path: str = "workspace.json", replicas: int = 2, nodes_dir: str = "Nodes") -> "AsyncGraph":
+        with open(file_path, "r") as f:
+            return cls(json.load(f), replicas, nodes_dir)
+
+    async def _acquire(self) -> Graph:
+        if self._free is None:
+            # Created on first use so it belongs to the running loop
+            self._free = asyncio.Queue()
+            for replica in self.replicas:
+                self._free.put_nowait(replica)
+        return await self._free.get()
+
+    def _release_when_done(self, replica: Graph, job: future.Future | None):
+        # A cancelled caller must not hand back a replica that is still executing
+        loop = asyncio.get_running_loop()
+        queue = self._free
+        assert queue is not None
+        if job is None or job.done():
+            queue.put_nowait(replica)
+        else:
+            job.add_done_callback(lambda _: loop.call_soon_threadsafe(queue.put_nowait, replica))
+
+    async def run(self, inputs: Any = None) -> GraphResult:
+        replica = await self._acquire()
+        job = None
+        try:
+            job = self._executor.submit(replica.run_sync, inputs)
+            return await asyncio.wrap_future(job)
+        finally:
+            self._release_when_done(replica, job)
+
+    async def stream(self, source: Iterable | AsyncIterable) -> AsyncIterator[GraphResult]:
+        replica = await self._acquire()
+        job = None
+        try:
+            async for inputs in _iterate(source):
+                job = self._executor.submit(replica.run_sync, inputs)
+                yield await asyncio.wrap_future(job)
+        finally:
+            self._release_when_done(replica, job)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for replica in self.replicas:
+            replica.close()
+
+    async def __aenter__(self) -> "AsyncGraph":
+        return self
+
+    async def __aexit__(self, *exc):
+        await asyncio.to_thread(self.close)
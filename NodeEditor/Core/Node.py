@@ -4,17 +4,23 @@ from typing import Any, Callable, Literal, Optional
 import dearpygui.dearpygui as dpg
 import copy
 import traceback
-import concurrent.futures as future
 from abc import ABC, abstractmethod
 
+from NodeEditor.Core.Governor import governor
 from NodeEditor.Core.NodePackage import NodePackage
 from NodeEditor.Core.Themes import *
 
 
+class ExecutionCancelled(Exception):
+    """Raised by `Node.check_cancelled` when the running execution has been superseded."""
+
+
 class NodeInput:
-    def __init__(self, label: str, type: str = "any", default_data: Any = None):
+    def __init__(self, label: str, type: str = "any", default_data: Any = None, optional: bool = False):
         self.label = label
         self.type = type
+        # Optional inputs don't block execution, execute receives None when they have no data
+        self.optional = optional
         self.connected_node: Node | None = None
         self.latest_data: NodePackage | None = None
         self.id = dpg.generate_uuid()
@@ -30,9 +36,20 @@ class NodeOutput:
 
 
 class Node(ABC):
-    def __init__(self, label: str, catagory: str, max_width: int = 100) -> None:
-        self.label = label
-        self.catagory = catagory
+    # Menu metadata is declared on the class so the editor can list a node without constructing it
+    label: str = ""
+    catagory: str = ""
+
+    # Nodes whose result is consumed outside the graph (a display, a file), they always have demand
+    is_sink: bool = False
+
+    # Pull mode, set by the editor. Only nodes on a path to a sink, an open preview or a
+    # requested output execute, the rest are marked stale until something needs them
+    demand_driven: bool = False
+
+    def __init__(self, label: str = "", catagory: str = "", max_width: int = 100) -> None:
+        self.label = label or self.label or self.__class__.__name__
+        self.catagory = catagory or self.catagory
         self._max_width = max(max_width, 100)
 
         self.inputs: list[NodeInput] = []
@@ -54,13 +71,29 @@ class Node(ABC):
         
         # Cache to store computed results for better performance
         self._cached_outputs = None
+        self._skipped_outputs: set[int] = set()  # Outputs the cached run left empty because nothing read them
         self._cache_valid = False
         self._cache_timestamp = 0
         self._cache_ttl = 1.0  # seconds
 
         # More efficient update scheduling
         self._update_scheduled = False
-        threading.Thread(target=self._update_thread, daemon=True).start()
+
+        # Bumped on every parameter change, runs started for an older generation are obsolete
+        self._generation = 0
+        self._run_state = threading.local()
+
+        # Single flight, one execution at a time and requests made meanwhile fold into one rerun
+        self._run_lock = threading.Lock()
+        self._rerun_pending = False
+
+        self._stale = False
+        self._output_requested = False
+
+        # Headless nodes (see Graph) are executed by their graph and never start an update thread
+        self.headless = False
+        self._update_thread_started = False
+        self._thread_lock = threading.Lock()
 
         self._node_delete_callback: Callable = lambda *args: None
         self._node_duplicate_callback: Callable = lambda *args: None
@@ -74,11 +107,14 @@ class Node(ABC):
     def on_save(self) -> dict:
         return {}
 
+    def on_delete(self):
+        pass
+
     def add_custom_output(self, call_back: Callable[[Any], Any], label: str = ""):
         self._custom_outputs.append((call_back, label))
 
-    def add_input(self, label: str = "", type: str = "any", default_data: Optional[NodePackage] = None) -> int:
-        node_input = NodeInput(label.capitalize() or f"Input {len(self.inputs)+1}", type.lower())
+    def add_input(self, label: str = "", type: str = "any", default_data: Optional[NodePackage] = None, optional: bool = False) -> int:
+        node_input = NodeInput(label.capitalize() or f"Input {len(self.inputs)+1}", type.lower(), optional=optional)
         node_input.latest_data = default_data
         idx = len(self.inputs)
         self.inputs.append(node_input)
@@ -104,10 +140,82 @@ class Node(ABC):
         self.update()
 
     def update(self):
+        # A parameter changed, anything still computing with the old values is obsolete
+        self._generation += 1
+        self._schedule_update()
+
+    def _schedule_update(self):
         # Invalidate cache and schedule update
         self._cache_valid = False
         self._update_call = True
         self._last_update_call = time.time()
+        self._start_update_thread()
+
+    def _start_update_thread(self):
+        if self._update_thread_started or self.headless:
+            return
+        with self._thread_lock:
+            if not self._update_thread_started:
+                self._update_thread_started = True
+                threading.Thread(target=self._update_thread, daemon=True).start()
+
+    def request_outputs(self, requested: bool = True):
+        """Mark the outputs as read from outside the graph, e.g. by a headless caller."""
+        self._output_requested = requested
+        if requested:
+            self._pull()
+
+    def output_demanded(self, idx: int) -> bool:
+        """Whether anything reads output `idx`, `execute` may skip building outputs nobody uses."""
+        if self._output_requested or getattr(self._run_state, "demand_all", False):
+            return True
+        if dpg.does_item_exist(self._node_preview_window_id):
+            # The preview shows every output
+            return True
+        consumers = self.outputs[idx].connected_nodes
+        if self.demand_driven:
+            return any(node._has_demand() for node in consumers)
+        return len(consumers) > 0
+
+    def _has_demand(self, visited: set["Node"] | None = None) -> bool:
+        if self.is_sink or self._output_requested or dpg.does_item_exist(self._node_preview_window_id):
+            return True
+        visited = set() if visited is None else visited
+        if self in visited:
+            return False
+        visited.add(self)
+        return any(
+            node._has_demand(visited)
+            for node_output in self.outputs
+            for node in node_output.connected_nodes
+        )
+
+    def _pull(self, visited: set["Node"] | None = None) -> bool:
+        # Demand appeared, schedule the stale nodes nearest the sources, their results flow down
+        visited = set() if visited is None else visited
+        if self in visited:
+            return False
+        visited.add(self)
+        upstream_scheduled = False
+        for node_input in self.inputs:
+            if node_input.connected_node is not None:
+                upstream_scheduled = node_input.connected_node._pull(visited) or upstream_scheduled
+        # An output skipped earlier may be read now
+        missing = any(self.output_demanded(idx) for idx in self._skipped_outputs)
+        if (self._stale or missing) and not upstream_scheduled:
+            self._schedule_update()
+            return True
+        return upstream_scheduled
+
+    @property
+    def cancelled(self) -> bool:
+        """True when the execution running in this thread has been superseded by a newer one."""
+        return getattr(self._run_state, "generation", self._generation) != self._generation
+
+    def check_cancelled(self):
+        """Call between steps of a long `execute` to stop as soon as its result is obsolete."""
+        if self.cancelled:
+            raise ExecutionCancelled()
 
     def viewer(self, outputs: list[NodePackage]):
         for o in outputs:
@@ -131,24 +239,26 @@ class Node(ABC):
         if len(self.outputs) == 0:
             return
 
-        # Use cached outputs if available, otherwise compute new ones
+        # Use cached outputs if available, otherwise run the node
         if outputs is None:
-            inputs = []
-            for node_input in self.inputs:
-                if node_input.connected_node is None or node_input.latest_data is None:
-                    self._on_warning()
-                    return
-                inputs.append(node_input.latest_data)
-
-            if len(inputs) != len(self.inputs):
-                return
-            
-            # If cache valid and recent, use cached outputs
-            if self._cache_valid and time.time() - self._cache_timestamp < self._cache_ttl:
+            if (self._cache_valid and not self._skipped_outputs and self._cached_outputs is not None
+                    and time.time() - self._cache_timestamp < self._cache_ttl):
                 outputs = self._cached_outputs
             else:
-                outputs = self.execute(copy.deepcopy(inputs))
-                
+                # Execute through the update thread so the preview keeps single flight and the
+                # governor, _run refreshes the preview once it is done. While it is open every
+                # output is demanded.
+                self._open_preview()
+                with dpg.node_attribute(
+                    attribute_type=dpg.mvNode_Attr_Static, parent=self._node_preview_window_id
+                ):
+                    dpg.add_button(label="Close", callback=self._close_preview)
+                    dpg.add_text("Waiting for a result...")
+                if self.demand_driven:
+                    self._pull()
+                self._schedule_update()
+                return
+
         if outputs is None:
             print("No outputs")
             return
@@ -156,14 +266,7 @@ class Node(ABC):
         if len(outputs) != len(self.outputs):
             return
 
-        if dpg.does_item_exist(self._node_preview_window_id):
-            dpg.delete_item(self._node_preview_window_id, children_only=True)
-        else:
-            dpg.add_node(
-                label=f"{self.label} Preview",
-                parent=self._node_editor_id,
-                tag=self._node_preview_window_id,
-            )
+        self._open_preview()
 
         with dpg.node_attribute(
             attribute_type=dpg.mvNode_Attr_Static, parent=self._node_preview_window_id
@@ -185,6 +288,16 @@ class Node(ABC):
             ):
                 self.viewer(outputs)
 
+    def _open_preview(self):
+        if dpg.does_item_exist(self._node_preview_window_id):
+            dpg.delete_item(self._node_preview_window_id, children_only=True)
+        else:
+            dpg.add_node(
+                label=f"{self.label} Preview",
+                parent=self._node_editor_id,
+                tag=self._node_preview_window_id,
+            )
+
     def _render_viewer(self):
         if not dpg.does_item_exist(self._node_preview_window_id):
             return
@@ -212,31 +325,56 @@ class Node(ABC):
             self._call_output_nodes()
 
     def force_update(self):
-        # Always invalidate the cache on force update
+        # Always invalidate the cache on force update, the run below is the update so the
+        # update thread isn't asked for another one
         self._cache_valid = False 
-        self._update_call = True
         self._cached_outputs = None
         self._call_output_nodes()
 
     def _call_output_nodes(self):
+        # The update thread, force_update and upstream nodes may all ask for a run at once.
+        # Whoever holds the lock reruns once more for every request made while it was running.
+        self._rerun_pending = True
+        while self._rerun_pending:
+            if not self._run_lock.acquire(blocking=False):
+                return
+            try:
+                self._rerun_pending = False
+                self._run()
+            finally:
+                self._run_lock.release()
+
+    def _run(self):
+        if self.demand_driven and not self._has_demand():
+            # Nothing downstream needs this result, run again when something does
+            self._stale = True
+            return
+        self._stale = False
         self._keep_error = False
 
+        # Claim the cache before reading inputs, an invalidation from here on clears the flag
+        # again so a change that arrives while executing isn't lost
+        use_cache = self._cache_valid and time.time() - self._cache_timestamp < self._cache_ttl
+        self._cache_valid = True
+
         # Gather inputs
         inputs = []
         all_inputs_valid = True
         
         for node_input in self.inputs:
-            if node_input.latest_data is None:
+            if node_input.latest_data is None and not node_input.optional:
                 all_inputs_valid = False
                 self._on_warning()
                 break
             inputs.append(node_input.latest_data)
         
         if not all_inputs_valid:
+            self._cache_valid = False
             return
         
         # Skip execution if all inputs aren't valid
         if len(inputs) != len(self.inputs):
+            self._cache_valid = False
             return
 
         try:
@@ -248,17 +386,32 @@ class Node(ABC):
             s_time = time.time()
             
             # Use cached result if valid, otherwise compute
-            if self._cache_valid and time.time() - self._cache_timestamp < self._cache_ttl:
+            if use_cache and self._cached_outputs is not None:
                 outputs = self._cached_outputs
             else:
-                outputs = (
-                    self.execute(copy.deepcopy(inputs))
-                    if not self._skip_execution
-                    else inputs
-                )
+                generation = self._generation
+                self._run_state.generation = generation
+                skipped = {idx for idx in range(len(self.outputs)) if not self.output_demanded(idx)}
+                try:
+                    # The governor bounds how many nodes execute at once and the threads each uses
+                    with governor.slot():
+                        # Waiting for a slot can take a while, don't start work that is already obsolete
+                        self.check_cancelled()
+                        s_time = time.time()
+                        outputs = (
+                            self.execute(copy.deepcopy(inputs))
+                            if not self._skip_execution
+                            else inputs
+                        )
+                finally:
+                    del self._run_state.generation
+                if self._generation != generation:
+                    # Superseded while running, the newer run is already scheduled
+                    self._cache_valid = False
+                    return
                 # Cache the results for future use
                 self._cached_outputs = outputs
-                self._cache_valid = True
+                self._skipped_outputs = skipped
                 self._cache_timestamp = time.time()
                 
             self._on_success() if not self._keep_error else None
@@ -266,7 +419,11 @@ class Node(ABC):
                 self._time_text_id,
                 f"{(time.time()-s_time)*1000:.2f}ms",
             )
+        except ExecutionCancelled:
+            self._cache_valid = False
+            return
         except Exception as e:
+            self._cache_valid = False
             traceback.print_exc()
             self.on_error(str(e))
             return
@@ -279,7 +436,6 @@ class Node(ABC):
         if dpg.does_item_exist(self._node_preview_window_id):
             self._view(outputs)
 
-        # Batch processing for connected nodes to avoid thread congestion
         connected_updates = []
         for idx, output_data in enumerate(outputs):
             if idx < len(self.outputs):
@@ -289,13 +445,9 @@ class Node(ABC):
                     connected_node._set_latest_input(output_data, self, idx)
                     connected_updates.append(connected_node)
                     
-        if len(connected_updates) == 0:
-            return
-        
-        # Schedule updates for all connected nodes - process in parallel with limitations
-        with future.ThreadPoolExecutor(max_workers=min(8, len(connected_updates))) as executor:
-            futures = [executor.submit(node.update) for node in connected_updates]
-            future.wait(futures, return_when=future.ALL_COMPLETED)
+        # Each node runs on its own update thread, the governor decides how many execute at once
+        for node in connected_updates:
+            node._schedule_update()
 
     def _set_latest_input(self, data: NodePackage, from_node: "Node", from_output_idx: int):
         for node_input in self.inputs:
@@ -1,4 +1,6 @@
 import copy
+import threading
+from typing import Any, Callable, Hashable, Sequence
 from cv2.typing import MatLike
 from cv2 import Mat
 import cv2
@@ -6,25 +8,177 @@ import numpy as np
 
 from dataclasses import dataclass, field
 
+
+class _DerivedCache:
+    """
+    Results computed from a package's pixels, such as contours or connected components.
+
+    Nodes receive deep copies of their input packages, so the cache returns itself when copied.
+    Every consumer of the same output then shares one cache and the first one to ask for an
+    analysis computes it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self._values: dict[Hashable, Any] = {}
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Compute outside the cache lock so different analyses don't wait on each other
+        with key_lock:
+            with self._lock:
+                if key in self._values:
+                    return self._values[key]
+            value = compute()
+            with self._lock:
+                self._values[key] = value
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __copy__(self) -> "_DerivedCache":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "_DerivedCache":
+        return self
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    # Cached results are shared between nodes, so nobody may modify them in place
+    array.flags.writeable = False
+    return array
+
+
 @dataclass
 class NodePackage:
     image_or_mask: MatLike = field(default_factory=lambda: Mat(np.zeros((1, 1, 3), dtype=np.uint8)))
-    
+    _derived: _DerivedCache = field(default_factory=_DerivedCache, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "image_or_mask" and "_derived" in self.__dict__:
+            # New pixels, anything derived from the old ones is stale
+            object.__setattr__(self, "_derived", _DerivedCache())
+        object.__setattr__(self, name, value)
+
+    @property
+    def gray(self) -> MatLike:
+        """Single channel version of the image, converted once and shared by every consumer."""
+        def compute():
+            image = self.image_or_mask
+            if len(image.shape) == 3 and image.shape[2] == 4:
+                return _read_only(cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY))
+            if len(image.shape) == 3 and image.shape[2] == 3:
+                return _read_only(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+            if len(image.shape) == 3:
+                return _read_only(image[:, :, 0].copy())
+            # The consumer's own pixels may be drawn on later, the shared result needs its own copy
+            return _read_only(image.copy())
+
+        return self._derived.get("gray", compute)
+
+    @property
+    def hsv(self) -> MatLike:
+        """HSV version of the image, converted once and shared by every consumer."""
+        def compute():
+            image = self.image_or_mask
+            if len(image.shape) == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            elif image.shape[2] == 4:
+                image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+            return _read_only(cv2.cvtColor(image, cv2.COLOR_BGR2HSV))
+
+        return self._derived.get("hsv", compute)
+
+    @property
+    def rgba(self) -> MatLike:
+        """RGBA version of the image as used by previews, converted once and shared by every consumer."""
+        def compute():
+            image = self.image_or_mask
+            if len(image.shape) == 2:
+                return _read_only(cv2.cvtColor(image, cv2.COLOR_GRAY2RGBA))
+            if image.shape[2] == 4:
+                return _read_only(cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA))
+            return _read_only(cv2.cvtColor(image, cv2.COLOR_BGR2RGBA))
+
+        return self._derived.get("rgba", compute)
+
+    def invalidate(self):
+        """Drop derived results, call this after drawing on `image_or_mask` in place."""
+        self._derived = _DerivedCache()
+
+    def _is_binary(self) -> bool:
+        # A mask holding only 0 and 255 thresholds to itself at any level below 255
+        return self._derived.get("is_binary", lambda: cv2.countNonZero(cv2.inRange(self.gray, 1, 254)) == 0)
+
+    def _threshold_key(self, threshold: int | None) -> int:
+        # None keeps every non-zero pixel, the same as thresholding at 0
+        threshold = 0 if threshold is None else int(threshold)
+        if 0 < threshold < 255 and self._is_binary():
+            return 0
+        return threshold
+
+    def binary(self, threshold: int | None = 127) -> MatLike:
+        """
+        Single channel mask of the image, pixels above `threshold` are set. None keeps every
+        non-zero pixel. Nodes asking for different thresholds of a mask that is already binary
+        share one result.
+        """
+        threshold = self._threshold_key(threshold)
+
+        def compute():
+            if threshold == 0 and self._is_binary():
+                # gray is a private read-only copy, never the consumer's own pixels
+                return self.gray
+            _, binary = cv2.threshold(self.gray, threshold, 255, cv2.THRESH_BINARY)
+            return _read_only(binary)
+
+        return self._derived.get(("binary", threshold), compute)
+
+    def contours(self, mode: int = cv2.RETR_EXTERNAL, method: int = cv2.CHAIN_APPROX_SIMPLE,
+                 threshold: int | None = None) -> tuple[Sequence[MatLike], MatLike | None]:
+        """Cached `cv2.findContours` of the mask, returns the contours and the hierarchy."""
+        threshold = self._threshold_key(threshold)
+
+        def compute():
+            contours, hierarchy = cv2.findContours(self.binary(threshold), mode, method)
+            contours = tuple(_read_only(contour) for contour in contours)
+            return contours, None if hierarchy is None else _read_only(hierarchy)
+
+        return self._derived.get(("contours", mode, method, threshold), compute)
+
+    def components(self, connectivity: int = 8,
+                   threshold: int | None = None) -> tuple[int, MatLike, MatLike, MatLike]:
+        """Cached `cv2.connectedComponentsWithStats`, returns the count, labels, stats and centroids."""
+        threshold = self._threshold_key(threshold)
+
+        def compute():
+            num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(
+                self.binary(threshold), connectivity=connectivity
+            )
+            return num_labels, _read_only(labels), _read_only(stats), _read_only(centroids)
+
+        return self._derived.get(("components", connectivity, threshold), compute)
+
     def copy(self) -> 'NodePackage':
-        new_package = NodePackage()
+        # Keep the subclass, its __init__ may need arguments
+        new_package = object.__new__(type(self))
         for key, value in self.__dict__.items():
             setattr(new_package, key, copy.deepcopy(value))
         return new_package
     
     def copy_resize(self, new_shape: tuple[int, int], pad_color: tuple[int, int, int, int] = (0, 0, 0, 0), keep_alpha: bool = False) -> MatLike:
-        img = copy.deepcopy(self.image_or_mask)
+        img = self.image_or_mask
         old_shape = img.shape
-        # Convert to 4 channels if needed
-        if len(old_shape) == 3 and old_shape[2] == 3:
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGBA)
-        elif len(old_shape) == 2:
-            if len(old_shape) == 2 or (len(old_shape) == 3 and old_shape[2] != 4):
-                img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGBA)
+        # Convert to 4 channels if needed, previews of the same package share the conversion
+        if len(old_shape) == 2 or old_shape[2] == 3 or keep_alpha:
+            img = self.rgba
         
         # Calculate the new size while preserving the aspect ratio
         old_height, old_width = old_shape[:2]
@@ -0,0 +1,213 @@
+import ast
+import importlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class NodeSpec:
+    """Everything the editor needs to know about a node class without importing its module."""
+    class_name: str
+    module: str
+    label: str
+    catagory: str
+    input_types: list[str] = field(default_factory=list)
+    output_types: list[str] = field(default_factory=list)
+    _class: Any = field(default=None, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def load(self) -> type:
+        # Import the module the first time the node is needed
+        with self._lock:
+            if self._class is None:
+                module = importlib.import_module(self.module)
+                self._class = getattr(module, self.class_name)
+                self.label = getattr(self._class, "label", "") or self.label
+                self.catagory = getattr(self._class, "catagory", "") or self.catagory
+        return self._class
+
+    def create(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def to_dict(self) -> dict:
+        return {
+            "class_name": self.class_name,
+            "module": self.module,
+            "label": self.label,
+            "catagory": self.catagory,
+            "input_types": self.input_types,
+            "output_types": self.output_types,
+        }
+
+
+class NodeRegistry:
+    """
+    Lists the nodes in a directory from a manifest cached on disk.
+
+    The manifest is keyed by file modification times, so only new or changed node files are
+    parsed. Node modules are parsed with `ast` rather than imported, and are only imported
+    when a node is first instantiated.
+    """
+
+    def __init__(self, nodes_dir: str, cache_path: str | None = None) -> None:
+        self.nodes_dir = nodes_dir
+        self.import_path = nodes_dir.replace("/", ".").strip(".")
+        self.cache_path = cache_path or os.path.join(nodes_dir, "__pycache__", "node_registry.json")
+        self._specs: dict[str, NodeSpec] = {}
+        self.refresh()
+
+    def refresh(self):
+        cached_files = self._read_manifest()
+        files = {}
+        changed = False
+
+        for file in sorted(os.listdir(self.nodes_dir)):
+            if not file.endswith(".py") or file.startswith("_"):
+                continue
+            mtime = os.path.getmtime(os.path.join(self.nodes_dir, file))
+            entry = cached_files.get(file)
+            if entry is None or entry.get("mtime") != mtime:
+                entry = {"mtime": mtime, "nodes": self._inspect_file(file)}
+                changed = True
+            files[file] = entry
+
+        if changed or files.keys() != cached_files.keys():
+            self._write_manifest(files)
+
+        specs = {}
+        for entry in files.values():
+            for node in entry["nodes"]:
+                spec = NodeSpec(**node)
+                # Keep already imported classes across refreshes
+                old = self._specs.get(spec.class_name)
+                if old is not None and old.module == spec.module:
+                    spec._class = old._class
+                specs[spec.class_name] = spec
+        self._specs = specs
+
+    def get(self, class_name: str) -> NodeSpec | None:
+        return self._specs.get(class_name)
+
+    def __getitem__(self, class_name: str) -> NodeSpec:
+        return self._specs[class_name]
+
+    def __contains__(self, class_name: str) -> bool:
+        return class_name in self._specs
+
+    def __iter__(self) -> Iterator[NodeSpec]:
+        return iter(self._specs.values())
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def port_types(self) -> list[str]:
+        types = []
+        for spec in self._specs.values():
+            for port_type in spec.input_types + spec.output_types:
+                if port_type not in types:
+                    types.append(port_type)
+        return types
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.cache_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("import_path") != self.import_path:
+            return {}
+        return manifest.get("files", {})
+
+    def _write_manifest(self, files: dict):
+        manifest = {"version": MANIFEST_VERSION, "import_path": self.import_path, "files": files}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "w") as f:
+                json.dump(manifest, f)
+        except OSError as e:
+            print("Error writing node registry manifest:", e)
+
+    def _inspect_file(self, file: str) -> list[dict]:
+        class_name = file[:-3]
+        module = f"{self.import_path}.{class_name}"
+        try:
+            with open(os.path.join(self.nodes_dir, file), "r") as f:
+                tree = ast.parse(f.read(), filename=file)
+        except (OSError, SyntaxError) as e:
+            print(f"Error: Could not parse node file '{file}':", e)
+            return []
+
+        class_def = next(
+            (n for n in tree.body if isinstance(n, ast.ClassDef) and n.name == class_name), None
+        )
+        if class_def is None:
+            return self._inspect_module(module, class_name)
+
+        label, catagory = _class_metadata(class_def)
+        input_types, output_types = _port_types(class_def)
+        return [NodeSpec(class_name, module, label or class_name, catagory,
+                         input_types, output_types).to_dict()]
+
+    def _inspect_module(self, module: str, class_name: str) -> list[dict]:
+        # The class is not declared statically, fall back to importing the module
+        try:
+            class_ = getattr(importlib.import_module(module), class_name)
+        except (ImportError, AttributeError) as e:
+            print(f"Error: Could not load node '{class_name}':", e)
+            return []
+        label = getattr(class_, "label", "") or class_name
+        return [NodeSpec(class_name, module, label, getattr(class_, "catagory", "")).to_dict()]
+
+
+def _constant_str(node: ast.AST | None) -> str | None:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _class_metadata(class_def: ast.ClassDef) -> tuple[str, str]:
+    metadata = {"label": "", "catagory": ""}
+    for statement in class_def.body:
+        if isinstance(statement, ast.Assign):
+            targets, value = statement.targets, statement.value
+        elif isinstance(statement, ast.AnnAssign):
+            targets, value = [statement.target], statement.value
+        else:
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id in metadata:
+                metadata[target.id] = _constant_str(value) or ""
+
+    # Older nodes pass the metadata to Node.__init__ instead
+    if not metadata["label"] or not metadata["catagory"]:
+        for call in ast.walk(class_def):
+            if (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                    and call.func.attr == "__init__"
+                    and isinstance(call.func.value, ast.Call)
+                    and isinstance(call.func.value.func, ast.Name)
+                    and call.func.value.func.id == "super"):
+                args = {k.arg: k.value for k in call.keywords}
+                for idx, key in enumerate(["label", "catagory"]):
+                    value = call.args[idx] if idx < len(call.args) else args.get(key)
+                    metadata[key] = metadata[key] or _constant_str(value) or ""
+                break
+
+    return metadata["label"], metadata["catagory"]
+
+
+def _port_types(class_def: ast.ClassDef) -> tuple[list[str], list[str]]:
+    ports: dict[str, list[str]] = {"add_input": [], "add_output": []}
+    for call in ast.walk(class_def):
+        if (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                and call.func.attr in ports
+                and isinstance(call.func.value, ast.Name) and call.func.value.id == "self"):
+            value = call.args[1] if len(call.args) > 1 else next(
+                (k.value for k in call.keywords if k.arg == "type"), None
+            )
+            ports[call.func.attr].append((_constant_str(value) or "any").lower())
+    return ports["add_input"], ports["add_output"]
@@ -0,0 +1,157 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator
+
+import cv2
+
+
+class _Entry:
+    def __init__(self) -> None:
+        self.value: Any = None
+        self.loaded = False
+        self.refs = 0
+        self.load_lock = threading.Lock()
+
+
+class ResourcePool:
+    """
+    Instances of an object that is not safe to use from two threads at once (e.g.
+    CascadeClassifier). Each user borrows its own, a new one is made when all are busy.
+    """
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._idle = [factory()]  # Made up front so loading errors surface on acquire
+        self.size = 1
+
+    @contextmanager
+    def borrow(self) -> Iterator[Any]:
+        with self._lock:
+            if self._idle:
+                instance = self._idle.pop()
+            else:
+                instance = None
+                self.size += 1
+        if instance is None:
+            instance = self._factory()
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                self._idle.append(instance)
+
+
+class ResourceHandle:
+    def __init__(self, registry: "ResourceRegistry", key: Hashable, entry: _Entry) -> None:
+        self._registry = registry
+        self._entry = entry
+        self.key = key
+        self.released = False
+
+    @property
+    def value(self) -> Any:
+        return self._entry.value
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self._registry._release(self.key)
+
+
+class ResourceRegistry:
+    """
+    Process-wide, reference counted cache of heavy assets such as cascades, templates and
+    lookup tables.
+
+    Nodes acquire a resource by key and every node asking for the same key shares one loaded
+    copy. The loader only runs on the first acquire. Unreferenced resources are kept in a small
+    LRU so that undo, paste and workspace reloads don't load them from disk again.
+    """
+
+    def __init__(self, keep_idle: int = 8) -> None:
+        self.keep_idle = keep_idle
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, _Entry] = {}
+        self._idle: OrderedDict[Hashable, _Entry] = OrderedDict()
+
+    def acquire(self, key: Hashable, loader: Callable[[], Any]) -> ResourceHandle:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._idle.pop(key, None) or _Entry()
+                self._entries[key] = entry
+            entry.refs += 1
+
+        # Load outside the registry lock so unrelated keys don't wait on each other
+        with entry.load_lock:
+            if not entry.loaded:
+                try:
+                    entry.value = loader()
+                except Exception:
+                    self._release(key)
+                    raise
+                entry.loaded = True
+        return ResourceHandle(self, key, entry)
+
+    def _release(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            del self._entries[key]
+            if entry.loaded and self.keep_idle > 0:
+                self._idle[key] = entry
+                while len(self._idle) > self.keep_idle:
+                    self._idle.popitem(last=False)
+
+    def clear_idle(self):
+        with self._lock:
+            self._idle.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": {key: entry.refs for key, entry in self._entries.items()},
+                "idle": list(self._idle.keys()),
+            }
+
+    def cascade(self, name: str) -> ResourceHandle:
+        """
+        Shared pool of `cv2.CascadeClassifier`s from the OpenCV data directory or a file path.
+        Borrow one per detection with `handle.value.borrow()`, so nodes detect in parallel.
+        """
+        path = name
+        if not os.path.exists(path):
+            import cv2.data
+            path = os.path.join(cv2.data.haarcascades, name)
+
+        def create():
+            classifier = cv2.CascadeClassifier(path)
+            if classifier.empty():
+                raise ValueError(f"Could not load cascade '{name}'")
+            return classifier
+
+        return self.acquire(("cascade", name), lambda: ResourcePool(create))
+
+    def template(self, path: str, flags: int = cv2.IMREAD_COLOR) -> ResourceHandle:
+        """Shared image read from disk. The key includes the mtime so edited files are reloaded."""
+        path = os.path.abspath(path)
+
+        def load():
+            image = cv2.imread(path, flags)
+            if image is None:
+                raise ValueError(f"Could not read template '{path}'")
+            # Shared between nodes, so nobody may draw on it
+            image.flags.writeable = False
+            return image
+
+        return self.acquire(("template", path, os.path.getmtime(path), flags), load)
+
+
+resources = ResourceRegistry()
@@ -2,10 +2,10 @@ import json
 import time
 from typing import Any
 import dearpygui.dearpygui as dpg
-import os
-import importlib
 
+from NodeEditor.Core.Governor import governor
 from NodeEditor.Core.Node import Node
+from NodeEditor.Core.NodeRegistry import NodeRegistry, NodeSpec
 
 class NodeEditor:
 
@@ -13,19 +13,20 @@ class NodeEditor:
         
         self.nodes_dir = nodes_dir
         
-        self.available_nodes: list = []
+        self.node_registry = NodeRegistry(nodes_dir)
         self.nodes: list[Node] = []
         self._menu_node_setup: dict[str, dict[str, list[dict[str, Any]]]] = {}
         self.node_links: list[tuple[int | str, int, int]] = []  # (link_id, start_attr, end_attr)
         self.node_editor = dpg.generate_uuid()
         self.right_click_menu = dpg.generate_uuid()
+        self.load_text_id = dpg.generate_uuid()
+        self._load_refresh = 0.0
         self._copied_nodes_data = None
-        self._node_types: list[str] = ["any"]
+        # Seed the pin types from the manifest so pin shapes don't depend on the order nodes are added
+        self._node_types: list[str] = ["any"] + [t for t in self.node_registry.port_types() if t != "any"]
         self._undo_stack: list = []
         self._redo_stack: list = []
         
-        self._auto_load_available_nodes()
-        
     def save_workspace(self, file_path: str = "workspace.json"):
         workspace_data = {
             "nodes": [],
@@ -77,11 +78,9 @@ class NodeEditor:
         # Load nodes
         for node_data in workspace_data["nodes"]:
             node_class_name = node_data["node_class"]
-            node_class = next(
-                (cls for cls in self.available_nodes if cls.__name__ == node_class_name), None
-            )
-            if node_class:
-                node = node_class()
+            node_spec = self.node_registry.get(node_class_name)
+            if node_spec:
+                node = node_spec.create()
                 self._add_node(node)
                 node.on_load(node_data.get("state", {}))
                 # Set node position
@@ -128,6 +127,24 @@ class NodeEditor:
         for node in source_nodes:
             node.force_update()
         
+    def set_demand_driven(self, enabled: bool):
+        Node.demand_driven = enabled
+        if not enabled:
+            # Catch up on everything that was skipped
+            for node in self.nodes:
+                node._pull()
+
+    def _update_load_text(self):
+        if time.time() - self._load_refresh < 0.5:
+            return
+        self._load_refresh = time.time()
+        stats = governor.stats()
+        dpg.set_value(
+            self.load_text_id,
+            f"CPU {stats['utilisation']*100:.0f}% | {stats['running']} running, {stats['waiting']} waiting"
+            f" | {stats['threads_per_node']} threads/node",
+        )
+
     def clear_workspace(self):
         # Delete all the links
         for link_id, _, _ in self.node_links:
@@ -135,29 +152,16 @@ class NodeEditor:
             
         # Delete all the nodes
         for node in self.nodes:
+            node.on_delete()
             dpg.delete_item(node._node_id)
             
         self.nodes = []
         self.node_links = []
         
-    def _auto_load_available_nodes(self):
-        
-        file_path = self.nodes_dir
-        import_path = file_path.replace("/", ".")
-        files = os.listdir(file_path)
-        
-        for file in files:
-            if file.endswith(".py") and not file.startswith("_"):
-                file = file.replace(".py", "")
-                module = importlib.import_module(f"{import_path}.{file}")
-                class_name = file
-                class_ = getattr(module, class_name)
-                self.available_nodes.append(class_)
-        
     def _setup_menu(self):
-        for node_class in self.available_nodes:
-            temp_node: Node = node_class()
-            category = temp_node.catagory
+        for node_spec in self.node_registry:
+            # The manifest holds the metadata, so node modules are only imported once used
+            category = node_spec.catagory or "Other"
             main_category, _, sub_category = category.partition("/")
 
             if main_category not in self._menu_node_setup:
@@ -167,8 +171,8 @@ class NodeEditor:
                 self._menu_node_setup[main_category][sub_category] = []
 
             node_info = {
-                "name": temp_node.label,
-                "user_data": node_class,
+                "name": node_spec.label,
+                "user_data": node_spec,
             }
 
             self._menu_node_setup[main_category][sub_category].append(node_info)
@@ -204,6 +208,7 @@ class NodeEditor:
             end_node.inputs[end_input_idx].connected_output_idx = start_output_idx
             
             # Immediately trigger an update for better responsiveness
+            start_node._pull()
             start_node.force_update()
         else:
             print("Error: Nodes not found for linking.")
@@ -267,13 +272,11 @@ class NodeEditor:
         # Duplicate the node
         node_object = node
         
-        for n in self.available_nodes:
-            if n.__name__ == node_object.__class__.__name__:
-                new_node = n()
-                break
-        else:
+        node_spec = self.node_registry.get(node_object.__class__.__name__)
+        if node_spec is None:
             print("Error: Node class not found.")
             return
+        new_node = node_spec.create()
         try:
             new_node.on_load(node_object.on_save())
         except Exception as e:
@@ -298,6 +301,7 @@ class NodeEditor:
                 self._delink_nodes_callback(None, link_id)
             # Delete the node
             node._close_preview(None, None)
+            node.on_delete()
             dpg.delete_item(node_id)
             self.nodes.remove(node)
         
@@ -322,12 +326,12 @@ class NodeEditor:
         return None, None        
         
     def _menu_callback(self, sender, user_data, app_data):
-        node_class = app_data
-        node = node_class()
+        node_spec: NodeSpec = app_data
+        node = node_spec.create()
         self._add_node(node)
         
     def _menu_callback_right_click(self, sender, user_data, app_data):
-        node: Node = app_data()
+        node: Node = app_data.create()
         self._add_node(node)
         dpg.configure_item(self.right_click_menu, show=False)
         mouse_position = dpg.get_mouse_pos(local=False)
@@ -441,12 +445,9 @@ class NodeEditor:
         
         new_nodes = []
         for node_info in self._copied_nodes_data["nodes"]:
-            node_class = next(
-                (cls for cls in self.available_nodes if cls.__name__ == node_info["class"]), 
-                None
-            )
-            if node_class:
-                node = node_class()
+            node_spec = self.node_registry.get(node_info["class"])
+            if node_spec:
+                node = node_spec.create()
                 node.on_load(node_info["state"])
                 old_pos = node_info["position"]
                 new_pos = (old_pos[0] + offset_x, old_pos[1] + offset_y)
@@ -546,11 +547,9 @@ class NodeEditor:
         # Load nodes
         for node_data in workspace_data["nodes"]:
             node_class_name = node_data["node_class"]
-            node_class = next(
-                (cls for cls in self.available_nodes if cls.__name__ == node_class_name), None
-            )
-            if node_class:
-                node = node_class()
+            node_spec = self.node_registry.get(node_class_name)
+            if node_spec:
+                node = node_spec.create()
                 node.on_load(node_data.get("state", {}))
                 self._add_node(node)
                 # Set node position
@@ -639,6 +638,20 @@ class NodeEditor:
                     dpg.add_menu_item(label="Clear Nodes", callback=self.clear_workspace)
                     dpg.add_menu_item(label="Save Workspace", callback=lambda: self.save_workspace())
                     dpg.add_menu_item(label="Load Workspace", callback=lambda: self.load_workspace())
+                    dpg.add_menu_item(
+                        label="Only Run Visible Nodes",
+                        check=True,
+                        default_value=Node.demand_driven,
+                        callback=lambda sender, app_data: self.set_demand_driven(app_data),
+                    )
+                    dpg.add_slider_int(
+                        label="Parallel Nodes",
+                        default_value=governor.max_parallel,
+                        min_value=1,
+                        max_value=governor.cores,
+                        width=100,
+                        callback=lambda sender, app_data: governor.configure(max_parallel=app_data),
+                    )
                     
                 for category, sub_categories in self._menu_node_setup.items():
                     with dpg.menu(label=category):
@@ -659,6 +672,8 @@ class NodeEditor:
                                         user_data=node["user_data"],
                                     )
                 
+                dpg.add_text("", tag=self.load_text_id)
+                
             self.compose()
             
         dpg.create_viewport(title="Main Viewport")
@@ -673,6 +688,7 @@ class NodeEditor:
         while dpg.is_dearpygui_running():
             for n in self.nodes:
                 n._render_viewer()
+            self._update_load_text()
             dpg.render_dearpygui_frame()
             
         dpg.destroy_context()
\ No newline at end of file
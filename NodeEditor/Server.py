@@ -0,0 +1,299 @@
+import argparse
+import base64
+import json
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from NodeEditor.Core.Governor import governor
+from NodeEditor.Core.Graph import Graph, GraphResult
+
+
+@dataclass
+class Job:
+    image: np.ndarray
+    input_name: str | None = None
+    enqueued: float = field(default_factory=time.perf_counter)
+    started: float = 0.0
+    done: threading.Event = field(default_factory=threading.Event)
+    result: GraphResult | None = None
+    error: str | None = None
+
+
+def encode_png(image: np.ndarray) -> str | None:
+    if image is None or image.size == 0:
+        return None
+    if image.dtype == bool:
+        image = image.astype(np.uint8) * 255
+    elif image.dtype not in (np.uint8, np.uint16):
+        if np.issubdtype(image.dtype, np.integer) and image.min() >= 0 and image.max() <= 65535:
+            # Label images and counts keep their values
+            image = image.astype(np.uint16)
+        else:
+            image = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U) # type: ignore
+    ok, data = cv2.imencode(".png", image)
+    return base64.b64encode(data.tobytes()).decode("ascii") if ok else None
+
+
+class Metrics:
+    def __init__(self, window: int = 2048) -> None:
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._queue_waits: deque[float] = deque(maxlen=window)
+        self._batch_sizes: deque[int] = deque(maxlen=window)
+        self.started = time.time()
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def record(self, job: Job, finished: float):
+        with self._lock:
+            self.completed += 1
+            self._latencies.append(finished - job.enqueued)
+            self._queue_waits.append(job.started - job.enqueued)
+
+    def record_batch(self, size: int):
+        with self._lock:
+            self._batch_sizes.append(size)
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def record_failed(self):
+        with self._lock:
+            self.failed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            waits = np.array(self._queue_waits) * 1000
+            uptime = time.time() - self.started
+            percentiles = (
+                dict(zip(("p50", "p90", "p99", "max"), np.percentile(latencies, [50, 90, 99, 100]).round(2).tolist()))
+                if len(latencies) else {}
+            )
+            return {
+                "uptime_s": round(uptime, 1),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "throughput_per_s": round(self.completed / uptime, 2) if uptime > 0 else 0.0,
+                "latency_ms": percentiles,
+                "queue_wait_ms_mean": round(float(waits.mean()), 2) if len(waits) else 0.0,
+                "batch_size_mean": round(float(np.mean(self._batch_sizes)), 2) if self._batch_sizes else 0.0,
+            }
+
+
+class InferenceServer:
+    """
+    Serves a workspace over HTTP.
+
+    Requests are put on a bounded queue, a full queue is answered with 503 instead of letting
+    latency grow without limit. Every worker thread owns a replica of the graph. A free worker
+    takes up to `max_batch` of the requests already queued and runs them with
+    `Graph.run_batch`, so under load each node starts once per batch instead of once per
+    request. It only waits for a batch to fill when `max_wait` is set, an idle server answers
+    a lone request straight away.
+    """
+
+    def __init__(self, workspace: dict, workers: int = 2, max_batch: int = 8, max_wait: float = 0.0,
+                 queue_size: int = 64, timeout: float = 30.0, nodes_dir: str = "Nodes") -> None:
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self.timeout = timeout
+        self.metrics = Metrics()
+        self._jobs: queue.Queue[Job | None] = queue.Queue(maxsize=max(1, queue_size))
+        self._replicas = [Graph(workspace, nodes_dir) for _ in range(max(1, workers))]
+        self._threads = [
+            threading.Thread(target=self._worker, args=(replica,), daemon=True, name=f"worker-{idx}")
+            for idx, replica in enumerate(self._replicas)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def nodes(self) -> list[str]:
+        return self._replicas[0].names
+
+    def submit(self, job: Job) -> bool:
+        try:
+            self._jobs.put_nowait(job)
+            return True
+        except queue.Full:
+            self.metrics.record_rejected()
+            return False
+
+    def _next_batch(self) -> list[Job | None]:
+        batch = [self._jobs.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch and batch[-1] is not None:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._jobs.get(timeout=remaining) if remaining > 0 else self._jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self, replica: Graph):
+        while True:
+            batch = self._next_batch()
+            jobs = [job for job in batch if job is not None]
+            if jobs:
+                self.metrics.record_batch(len(jobs))
+                started = time.perf_counter()
+                for job in jobs:
+                    job.started = started
+                try:
+                    results = replica.run_batch([
+                        job.image if job.input_name is None else {job.input_name: job.image} for job in jobs
+                    ])
+                except Exception as e:
+                    for job in jobs:
+                        job.error = str(e)
+                        self.metrics.record_failed()
+                        job.done.set()
+                else:
+                    finished = time.perf_counter()
+                    for job, result in zip(jobs, results):
+                        job.result = result
+                        self.metrics.record(job, finished)
+                        job.done.set()
+            if len(jobs) != len(batch):
+                # Shutdown sentinel
+                return
+
+    def close(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        for replica in self._replicas:
+            replica.close()
+
+    def handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status: int, data: dict, headers: dict | None = None):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    metrics = server.metrics.snapshot()
+                    metrics["queue_depth"] = server._jobs.qsize()
+                    metrics["governor"] = governor.stats()
+                    self._send_json(200, metrics)
+                elif self.path == "/health":
+                    self._send_json(200, {"status": "ok", "nodes": server.nodes})
+                else:
+                    self._send_json(404, {"error": "Not found"})
+
+            def do_POST(self):
+                if self.path != "/infer":
+                    self._send_json(404, {"error": "Not found"})
+                    return
+
+                input_name = None
+                try:
+                    body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                    if self.headers.get("Content-Type", "").startswith("application/json"):
+                        # {"image": "<base64>", "input": "<node name>"}
+                        request = json.loads(body)
+                        if not isinstance(request, dict):
+                            raise ValueError("expected a JSON object")
+                        input_name = request.get("input")
+                        if input_name is not None and input_name not in server.nodes:
+                            raise ValueError(f"no node named {input_name!r}")
+                        body = base64.b64decode(request["image"])
+                    image = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_UNCHANGED)
+                except (ValueError, KeyError, TypeError, AttributeError, cv2.error) as e:
+                    self._send_json(400, {"error": f"Bad request: {e}"})
+                    return
+                if image is None:
+                    self._send_json(400, {"error": "Could not decode the image"})
+                    return
+
+                job = Job(image, input_name)
+                if not server.submit(job):
+                    self._send_json(503, {"error": "Queue full"}, {"Retry-After": "1"})
+                    return
+                if not job.done.wait(server.timeout):
+                    self._send_json(504, {"error": "Timed out"})
+                    return
+                if job.error is not None or job.result is None:
+                    self._send_json(500, {"error": job.error or "No result"})
+                    return
+
+                finished = time.perf_counter()
+                self._send_json(200, {
+                    "outputs": {
+                        name: [encode_png(package.image_or_mask) for package in packages]
+                        for name, packages in job.result.outputs.items()
+                    },
+                    "errors": job.result.errors,
+                    "latency_ms": round((finished - job.enqueued) * 1000, 2),
+                    "queue_ms": round((job.started - job.enqueued) * 1000, 2),
+                })
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8000):
+        httpd = ThreadingHTTPServer((host, port), self.handler())
+        httpd.daemon_threads = True
+        print(f"Serving {self.nodes} on http://{host}:{port} (POST /infer, GET /metrics)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            self.close()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Serve a saved workspace over HTTP.")
+    parser.add_argument("workspace", nargs="?", default="workspace.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2, help="Graph replicas, one per worker thread")
+    parser.add_argument("--max-batch", type=int, default=8, help="Queued requests a worker runs as one batch")
+    parser.add_argument("--max-wait-ms", type=float, default=0.0, help="How long a worker waits for a batch to fill")
+    parser.add_argument("--queue-size", type=int, default=64, help="Queued requests before answering 503")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request is answered 504")
+    parser.add_argument("--nodes-dir", default="Nodes")
+    args = parser.parse_args(argv)
+
+    with open(args.workspace, "r") as f:
+        workspace = json.load(f)
+
+    server = InferenceServer(
+        workspace,
+        workers=args.workers,
+        max_batch=args.max_batch,
+        max_wait=args.max_wait_ms / 1000,
+        queue_size=args.queue_size,
+        timeout=args.timeout,
+        nodes_dir=args.nodes_dir,
+    )
+    server.serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
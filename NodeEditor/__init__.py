@@ -1,5 +1,7 @@
-from NodeEditor.Core.Node import Node
+from NodeEditor.Core.Node import ExecutionCancelled, Node
 from NodeEditor.Core.NodePackage import NodePackage
+from NodeEditor.Core.ContourPackage import Contour, ContourPackage
+from NodeEditor.Core.Graph import AsyncGraph, Graph, GraphResult
 import dearpygui.dearpygui as dpg
 
-__all__ = ["Node", "NodePackage"]
\ No newline at end of file
+__all__ = ["Node", "ExecutionCancelled", "NodePackage", "Contour", "ContourPackage", "Graph", "AsyncGraph", "GraphResult"]
\ No newline at end of file
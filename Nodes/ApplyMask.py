@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class ApplyMask(Node):
+    label = "Apply Mask"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Apply Mask", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image", "image")
         self.add_input("mask", "mask")
         self.add_output("image", "image")
@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class Blur(Node):
+    label = "Blur"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Blur", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
         self.blur_amount_input = dpg.generate_uuid()
@@ -4,10 +4,22 @@ import dearpygui.dearpygui as dpg
 import numpy as np
 from NodeEditor import Node, NodePackage
 import threading
+import weakref
+
+RETRY_DELAY = 2.0  # Seconds before opening a camera that failed to open again
 
 class Camera(Node):
+    label = "Camera"
+    catagory = "Inputs"
+
+    # Camera enumeration is shared by every Camera node and runs in the background
+    _available_cameras: list[str] | None = None
+    _enumeration_lock = threading.Lock()
+    _enumeration_thread: threading.Thread | None = None
+    _instances: "weakref.WeakSet[Camera]" = weakref.WeakSet()
+
     def __init__(self):
-        super().__init__("Camera", "Inputs", 400)
+        super().__init__(max_width=400)
         self.camera_id = 0
         self.camera_selector = dpg.generate_uuid()
         self.image_view = dpg.generate_uuid()
@@ -16,13 +28,45 @@ class Camera(Node):
         self.is_streaming = False
         self.toggle_button = dpg.generate_uuid()
         self.cap = None
+        self._reopen_requested = False  # Only execute touches the capture, the UI thread just asks for a new one
+        self._capture_lock = threading.Lock()
+        self._retry_at = 0.0
+        self._deleted = False
+        self.refresh_button = dpg.generate_uuid()
 
     def on_init(self):
+        Camera._instances.add(self)
         threading.Thread(target=self.stream_camera, daemon=True).start()
-        self.available_cameras = self.get_available_cameras()
-        self.cap = cv2.VideoCapture(self.camera_id)
-
-    def get_available_cameras(self):
+        # The capture is opened lazily by execute so adding a node never blocks the UI
+        Camera.enumerate_cameras()
+
+    @property
+    def available_cameras(self) -> list[str]:
+        cameras = set(Camera._available_cameras or [])
+        # A camera held open by a node may not show up when probed, so always list our own
+        cameras.add(str(self.camera_id))
+        return sorted(cameras, key=int)
+
+    @classmethod
+    def enumerate_cameras(cls, refresh: bool = False):
+        with cls._enumeration_lock:
+            if cls._enumeration_thread is not None and cls._enumeration_thread.is_alive():
+                return
+            if cls._available_cameras is not None and not refresh:
+                return
+            cls._enumeration_thread = threading.Thread(target=cls._enumerate_cameras, daemon=True)
+            cls._enumeration_thread.start()
+
+    @classmethod
+    def _enumerate_cameras(cls):
+        cameras = cls.get_available_cameras()
+        with cls._enumeration_lock:
+            cls._available_cameras = cameras
+        for camera in list(cls._instances):
+            camera._update_camera_list()
+
+    @staticmethod
+    def get_available_cameras() -> list[str]:
         # Check the first 10 indexes.
         available_cameras = []
         for i in range(10):
@@ -32,6 +76,30 @@ class Camera(Node):
                 cap.release()
         return available_cameras
 
+    def refresh_cameras(self):
+        dpg.configure_item(self.refresh_button, label="Searching...", enabled=False)
+        Camera.enumerate_cameras(refresh=True)
+
+    def _update_camera_list(self):
+        if dpg.does_item_exist(self.camera_selector):
+            dpg.configure_item(self.camera_selector, items=self.available_cameras)
+        if dpg.does_item_exist(self.refresh_button):
+            dpg.configure_item(self.refresh_button, label="Refresh Cameras", enabled=True)
+
+    def _release_capture(self):
+        # execute may be inside cap.read(), it swaps the capture itself on its next run
+        self._reopen_requested = True
+
+    def on_delete(self):
+        self._deleted = True
+        self.is_streaming = False
+        Camera._instances.discard(self)
+        # Waits for a read in progress, execute doesn't open a capture again once deleted
+        with self._capture_lock:
+            if self.cap is not None:
+                self.cap.release()
+                self.cap = None
+
     def on_save(self) -> dict:
         return {
             "camera_id": self.camera_id,
@@ -39,17 +107,21 @@ class Camera(Node):
 
     def on_load(self, data: dict):
         self.camera_id = data["camera_id"]
-        self.cap = cv2.VideoCapture(self.camera_id)
-        self.update_camera()
+        if dpg.does_item_exist(self.camera_selector):
+            dpg.set_value(self.camera_selector, str(self.camera_id))
+        self._release_capture()
+        self.update()
 
     def update_camera(self):
         self.camera_id = int(dpg.get_value(self.camera_selector))
-        self.cap = cv2.VideoCapture(self.camera_id)
+        self._release_capture()
         self.update()
 
     def compose(self):
         dpg.add_text("Select Camera:")
         dpg.add_combo(items=self.available_cameras, default_value=str(self.camera_id), tag=self.camera_selector, width=200, callback=self.update_camera)
+        searching = Camera._available_cameras is None
+        dpg.add_button(label="Searching..." if searching else "Refresh Cameras", tag=self.refresh_button, enabled=not searching, callback=self.refresh_cameras)
         dpg.add_button(label="Stop Streaming" if self.is_streaming else "Start Streaming", tag=self.toggle_button, callback=self.toggle_streaming)
 
         with dpg.texture_registry():
@@ -63,20 +135,27 @@ class Camera(Node):
         self.update()
     
     def stream_camera(self):
-        while True:
-            if not self.is_streaming:
+        while not self._deleted:
+            if not self.is_streaming or time.monotonic() < self._retry_at:
                 time.sleep(0.1)
                 continue
             self.force_update()
 
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         
-        if self.cap is None:
-            return [NodePackage(image_or_mask=np.zeros((400, 400, 4), dtype=np.uint8))]
-        
-        if not self.cap.isOpened():
-            self.cap = cv2.VideoCapture(self.camera_id)
-        ret, frame = self.cap.read()
+        with self._capture_lock:
+            if self._deleted:
+                return [NodePackage(image_or_mask=np.zeros((400, 400, 4), dtype=np.uint8))]
+            cap = self.cap
+            if (self._reopen_requested or cap is None
+                    or (not cap.isOpened() and time.monotonic() >= self._retry_at)):
+                self._reopen_requested = False
+                if cap is not None:
+                    cap.release()
+                cap = self.cap = cv2.VideoCapture(self.camera_id)
+                # A missing or unplugged camera isn't opened again on every frame
+                self._retry_at = 0.0 if cap.isOpened() else time.monotonic() + RETRY_DELAY
+            ret, frame = cap.read() if cap.isOpened() else (False, None)
         if not ret:
             return [NodePackage(image_or_mask=np.zeros((400, 400, 4), dtype=np.uint8))]
         frame = cv2.flip(frame, 1)
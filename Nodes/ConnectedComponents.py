@@ -1,13 +1,33 @@
-import random
 import cv2
 import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
+PALETTE_SEED = 0
+PALETTE_BLOCK = 1024
+
+
+def palette(count: int, seed: int = PALETTE_SEED) -> np.ndarray:
+    """Deterministic colour per label, label 0 (background) is black."""
+    # Every block has its own seed so a label keeps its colour however many labels there are
+    blocks = [
+        np.random.default_rng([seed, block]).integers(64, 256, (PALETTE_BLOCK, 3), dtype=np.uint8)
+        for block in range((count + PALETTE_BLOCK - 1) // PALETTE_BLOCK)
+    ]
+    colours = np.concatenate(blocks)[:count] if blocks else np.zeros((0, 3), np.uint8)
+    if count:
+        colours[0] = 0
+    return colours
+
+
 class ConnectedComponents(Node):
+    label = "Connected Components"
+    catagory = "Analysis"
+
     def __init__(self):
-        super().__init__("Connected Components", "Analysis", 200)
+        super().__init__(max_width=200)
         self.add_input("Mask", "mask")
         self.add_output("Mask", "mask")
+        self.add_output("Labels", "labels")
         
         # UI Controls
         self.num_components_id = dpg.generate_uuid()
@@ -18,51 +38,59 @@ class ConnectedComponents(Node):
         # Default values
         self.num_components = 0
         self.color_components = False
+        self._palette = palette(0)
 
     def on_save(self) -> dict:
         return {
-            "color_components": dpg.get_value(self.color_components_id),
+            "color_components": self.color_components,
         }
     
     def on_load(self, data: dict):
-        
-        dpg.set_value(self.color_components_id, data["color_components"])
-        
+        self.color_components = data["color_components"]
+        if dpg.does_item_exist(self.color_components_id):
+            dpg.set_value(self.color_components_id, self.color_components)
         self.update()
-        
+
+    def update_params(self):
+        self.color_components = dpg.get_value(self.color_components_id)
+        self.update()
+
     def compose(self):
         dpg.add_text("Count: 0", tag=self.num_components_id)
-        dpg.add_checkbox(label="Colored", callback=self.update, tag=self.color_components_id)
+        dpg.add_checkbox(label="Colored", default_value=self.color_components,
+                         callback=self.update_params, tag=self.color_components_id)
+
+    def colorize(self, labels: np.ndarray, num_labels: int) -> np.ndarray:
+        if len(self._palette) < num_labels:
+            self._palette = palette(num_labels)
+        return self._palette[labels]
 
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
-        
-        img = inputs[0].image_or_mask
-        
-        if len(img.shape) < 2:
-            self.on_error("The image is not binary")
-            return inputs
-        
-        num_labels, labels = cv2.connectedComponents(img)
-        self.num_components = num_labels
+        # One labelling pass gives the label image, the per-component stats and the centroids
+        num_labels, labels, stats, centroids = inputs[0].components()
+        self.num_components = num_labels - 1
         dpg.set_value(self.num_components_id, f"Count: {self.num_components}")
 
-        output_image = np.zeros((img.shape[0], img.shape[1], 3), dtype=np.uint8)
-        
-        if dpg.get_value(self.color_components_id):
-            for label in range(1, num_labels):  # Start from 1 to skip the background
-                # Generate a random color (R, G, B)
-                random_color = [random.randint(0, 255) for _ in range(3)]
-                
-                # Apply the random color to all pixels belonging to the current label
-                output_image[labels == label] = random_color
-                return [NodePackage(output_image)]
-        return [NodePackage(labels)]
-        
-        
+        if self.color_components:
+            visualization = self.colorize(labels, num_labels)
+        else:
+            visualization = np.where(labels > 0, 255, 0).astype(np.uint8)
+
+        outputs = [NodePackage(visualization), NodePackage(labels)]
+        for package in outputs:
+            package.num_labels = num_labels
+            package.stats = stats
+            package.centroids = centroids
+        return outputs
 
     def viewer(self, outputs: list[NodePackage]):
         # Display both the visualization and the labels
         for i, data in enumerate(outputs):
+            if i == 1:
+                # The label image is int32, show it through the palette
+                labels = data.image_or_mask
+                num_labels = getattr(data, "num_labels", int(labels.max()) + 1)
+                data = NodePackage(self.colorize(labels, num_labels))
             img_tag = dpg.generate_uuid()
             with dpg.texture_registry():
                 dpg.add_dynamic_texture(400, 400, [0.0, 0.0, 0.0, 0.0]*400*400, tag=img_tag)
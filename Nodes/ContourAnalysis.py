@@ -1,14 +1,18 @@
 import cv2
 import numpy as np
 import dearpygui.dearpygui as dpg
-from NodeEditor import Node, NodePackage
+from NodeEditor import Contour, ContourPackage, Node, NodePackage
 
 class ContourAnalysis(Node):
+    label = "Contour Analysis"
+    catagory = "Analytics"
+
     def __init__(self):
-        super().__init__("Contour Analysis", "Analytics", 250)
+        super().__init__(max_width=250)
         self.add_input("image")
         self.add_output("image")  # Visualization output
         self.add_output("mask")   # Contour mask output
+        self.add_output("contours", "contours")  # The same shapes as polygons
         
         # UI Controls
         self.mode_id = dpg.generate_uuid()
@@ -63,54 +67,51 @@ class ContourAnalysis(Node):
 
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         if not inputs or inputs[0].image_or_mask is None:
-            return [NodePackage(), NodePackage()]
+            return [NodePackage(), NodePackage(), ContourPackage()]
             
         image = inputs[0].image_or_mask
-        
-        # Convert to grayscale if needed
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
             
-        # Find contours
-        contours, _ = cv2.findContours(gray, self.mode, self.method)
+        # Find contours, shared with other nodes analysing the same package
+        contours, _ = inputs[0].contours(self.mode, self.method)
         
         # Filter contours by area
         contours = [cnt for cnt in contours if cv2.contourArea(cnt) > self.min_area]
         
-        # Create visualization
-        if len(image.shape) == 2:
-            vis_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
-        else:
-            vis_image = image.copy()
-            
-        # Create mask
-        mask = np.zeros(gray.shape, dtype=np.uint8)
-        
+        # Shapes to output
+        shapes = []
         if contours:
             if self.draw_type == "All Contours":
-                cv2.drawContours(vis_image, contours, -1, (0, 255, 0), 2)
-                cv2.drawContours(mask, contours, -1, 255, -1) # type: ignore
+                shapes = contours
             
             elif self.draw_type == "Largest Contour":
-                largest = max(contours, key=cv2.contourArea)
-                cv2.drawContours(vis_image, [largest], -1, (0, 255, 0), 2)
-                cv2.drawContours(mask, [largest], -1, 255, -1) # type: ignore
+                shapes = [max(contours, key=cv2.contourArea)]
             
             elif self.draw_type == "Convex Hull":
-                for cnt in contours:
-                    hull = cv2.convexHull(cnt)
-                    cv2.drawContours(vis_image, [hull], -1, (0, 255, 0), 2)
-                    cv2.drawContours(mask, [hull], -1, 255, -1) # type: ignore
+                shapes = [cv2.convexHull(cnt) for cnt in contours]
             
             elif self.draw_type == "Bounding Boxes":
                 for cnt in contours:
                     x, y, w, h = cv2.boundingRect(cnt)
-                    cv2.rectangle(vis_image, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                    cv2.rectangle(mask, (x, y), (x+w, y+h), 255, -1)
+                    shapes.append(np.array([[x, y], [x+w, y], [x+w, y+h], [x, y+h]], dtype=np.int32))
+
+        # Create visualization, unless nothing reads it
+        visualization = NodePackage()
+        if self.output_demanded(0):
+            if len(image.shape) == 2:
+                vis_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            else:
+                vis_image = image.copy()
+            if shapes:
+                cv2.drawContours(vis_image, [s.reshape(-1, 1, 2) for s in shapes], -1, (0, 255, 0), 2)
+            visualization = NodePackage(image_or_mask=vis_image)
+
+        # The mask is only drawn if a consumer reads its pixels
+        polygons = ContourPackage(
+            polygons=[Contour.from_points(s) for s in shapes],
+            frame_shape=image.shape[:2],
+        )
 
-        return [NodePackage(image_or_mask=vis_image), NodePackage(image_or_mask=mask)]
+        return [visualization, polygons, polygons]
 
     def viewer(self, outputs: list[NodePackage]):
         data = outputs[0]
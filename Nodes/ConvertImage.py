@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class ConvertImage(Node):
+    label = "Convert Image"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Convert Image", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
         
@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class Crop(Node):
+    label = "Crop"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Crop", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
         
@@ -5,8 +5,11 @@ import ast
 import textwrap
 
 class CustomCode(Node):
+    label = "Custom Code"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Custom Code", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
         
@@ -1,10 +1,28 @@
+from collections import deque
 import cv2
 import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
+DENOISE_TYPES = ["Gaussian Blur", "Median Blur", "Bilateral Filter", "Non-local Means", "Temporal"]
+TEMPORAL_METHODS = ["NL-Means Multi", "Recursive"]
+NL_MEANS_MIN_STRIPE = 192  # Rows per Non-local Means stripe
+
+
+def estimate_noise(gray: np.ndarray) -> float:
+    """Standard deviation of additive noise, Immerkaer's fast estimator."""
+    height, width = gray.shape[:2]
+    if height < 3 or width < 3:
+        return 0.0
+    kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+    response = cv2.filter2D(gray, cv2.CV_32F, kernel)[1:-1, 1:-1]
+    return float(np.sqrt(np.pi / 2) * cv2.norm(response, cv2.NORM_L1) / (6 * (width - 2) * (height - 2)))
+
 class Denoise(Node):
+    label = "Denoise"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Denoise", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
         
@@ -17,6 +35,16 @@ class Denoise(Node):
         self.nlmeans_h_id = dpg.generate_uuid()
         self.nlmeans_template_size_id = dpg.generate_uuid()
         self.nlmeans_search_size_id = dpg.generate_uuid()
+        self.blur_group_id = dpg.generate_uuid()
+        self.bilateral_group_id = dpg.generate_uuid()
+        self.nlmeans_group_id = dpg.generate_uuid()
+        self.temporal_group_id = dpg.generate_uuid()
+        self.temporal_method_id = dpg.generate_uuid()
+        self.temporal_window_id = dpg.generate_uuid()
+        self.temporal_scale_id = dpg.generate_uuid()
+        self.adaptive_id = dpg.generate_uuid()
+        self.noise_level_id = dpg.generate_uuid()
+        self.estimated_noise_id = dpg.generate_uuid()
         
         # Default values
         self.denoise_type = "Gaussian Blur"
@@ -27,6 +55,16 @@ class Denoise(Node):
         self.nlmeans_h = 3
         self.nlmeans_template_size = 7
         self.nlmeans_search_size = 21
+        self.temporal_method = "Recursive"
+        self.temporal_window = 5    # Frames used by NL-Means Multi, the output lags by half of it
+        self.temporal_scale = 1.0   # Denoise at a fraction of the resolution and upsample
+        self.adaptive = True        # Follow the noise level measured in the frames
+        self.noise_level = 1.0      # Multiplier on the measured noise, or the noise sigma when not adaptive
+
+        # Streaming state
+        self._frames: deque[np.ndarray] = deque(maxlen=self.temporal_window)
+        self._accumulator: np.ndarray | None = None
+        self._sigma: float | None = None
 
     def on_save(self) -> dict:
         return {
@@ -37,7 +75,12 @@ class Denoise(Node):
             "bilateral_sigma_space": self.bilateral_sigma_space,
             "nlmeans_h": self.nlmeans_h,
             "nlmeans_template_size": self.nlmeans_template_size,
-            "nlmeans_search_size": self.nlmeans_search_size
+            "nlmeans_search_size": self.nlmeans_search_size,
+            "temporal_method": self.temporal_method,
+            "temporal_window": self.temporal_window,
+            "temporal_scale": self.temporal_scale,
+            "adaptive": self.adaptive,
+            "noise_level": self.noise_level,
         }
     
     def on_load(self, data: dict):
@@ -49,10 +92,42 @@ class Denoise(Node):
         self.nlmeans_h = data["nlmeans_h"]
         self.nlmeans_template_size = data["nlmeans_template_size"]
         self.nlmeans_search_size = data["nlmeans_search_size"]
+        self.temporal_method = data.get("temporal_method", self.temporal_method)
+        self.temporal_window = data.get("temporal_window", self.temporal_window)
+        self.temporal_scale = data.get("temporal_scale", self.temporal_scale)
+        self.adaptive = data.get("adaptive", self.adaptive)
+        self.noise_level = data.get("noise_level", self.noise_level)
+        # Show the loaded values, update_params reads the widgets back
+        for tag, value in (
+            (self.denoise_type_id, self.denoise_type),
+            (self.blur_amount_id, self.blur_amount),
+            (self.bilateral_diameter_id, self.bilateral_diameter),
+            (self.bilateral_sigma_color_id, self.bilateral_sigma_color),
+            (self.bilateral_sigma_space_id, self.bilateral_sigma_space),
+            (self.nlmeans_h_id, self.nlmeans_h),
+            (self.nlmeans_template_size_id, self.nlmeans_template_size),
+            (self.nlmeans_search_size_id, self.nlmeans_search_size),
+            (self.temporal_method_id, self.temporal_method),
+            (self.temporal_window_id, self.temporal_window),
+            (self.temporal_scale_id, self.temporal_scale),
+            (self.adaptive_id, self.adaptive),
+            (self.noise_level_id, self.noise_level),
+        ):
+            if dpg.does_item_exist(tag):
+                dpg.set_value(tag, value)
+        if dpg.does_item_exist(self.blur_group_id):
+            self.show_controls()
+        self.reset_stream()
         self.update()
 
+    def reset_stream(self):
+        self._frames = deque(maxlen=max(1, self.temporal_window))
+        self._accumulator = None
+        self._sigma = None
+
     def update_params(self):
         self.denoise_type = dpg.get_value(self.denoise_type_id)
+        self.show_controls()
         if self.denoise_type in ["Gaussian Blur", "Median Blur"]:
             self.blur_amount = dpg.get_value(self.blur_amount_id)
         elif self.denoise_type == "Bilateral Filter":
@@ -63,19 +138,33 @@ class Denoise(Node):
             self.nlmeans_h = dpg.get_value(self.nlmeans_h_id)
             self.nlmeans_template_size = dpg.get_value(self.nlmeans_template_size_id)
             self.nlmeans_search_size = dpg.get_value(self.nlmeans_search_size_id)
+        elif self.denoise_type == "Temporal":
+            self.temporal_method = dpg.get_value(self.temporal_method_id)
+            self.temporal_window = max(1, dpg.get_value(self.temporal_window_id))
+            self.temporal_scale = dpg.get_value(self.temporal_scale_id)
+            self.adaptive = dpg.get_value(self.adaptive_id)
+            self.noise_level = dpg.get_value(self.noise_level_id)
+            if self.temporal_window != self._frames.maxlen:
+                self._frames = deque(self._frames, maxlen=self.temporal_window)
         self.update()
 
+    def show_controls(self):
+        dpg.configure_item(self.blur_group_id, show=self.denoise_type in ["Gaussian Blur", "Median Blur"])
+        dpg.configure_item(self.bilateral_group_id, show=self.denoise_type == "Bilateral Filter")
+        dpg.configure_item(self.nlmeans_group_id, show=self.denoise_type == "Non-local Means")
+        dpg.configure_item(self.temporal_group_id, show=self.denoise_type == "Temporal")
+
     def compose(self):
         dpg.add_text("Denoise Method:")
         dpg.add_combo(
-            items=["Gaussian Blur", "Median Blur", "Bilateral Filter", "Non-local Means"],
+            items=DENOISE_TYPES,
             default_value=self.denoise_type,
             callback=self.update_params,
             tag=self.denoise_type_id,
             width=185
         )
         
-        if self.denoise_type in ["Gaussian Blur", "Median Blur"]:
+        with dpg.group(tag=self.blur_group_id, show=self.denoise_type in ["Gaussian Blur", "Median Blur"]):
             dpg.add_input_int(
                 label="Blur Amount",
                 default_value=self.blur_amount,
@@ -84,7 +173,7 @@ class Denoise(Node):
                 tag=self.blur_amount_id,
                 width=185
             )
-        elif self.denoise_type == "Bilateral Filter":
+        with dpg.group(tag=self.bilateral_group_id, show=self.denoise_type == "Bilateral Filter"):
             dpg.add_input_int(
                 label="Diameter",
                 default_value=self.bilateral_diameter,
@@ -107,7 +196,7 @@ class Denoise(Node):
                 tag=self.bilateral_sigma_space_id,
                 width=185
             )
-        elif self.denoise_type == "Non-local Means":
+        with dpg.group(tag=self.nlmeans_group_id, show=self.denoise_type == "Non-local Means"):
             dpg.add_input_float(
                 label="H value",
                 default_value=self.nlmeans_h,
@@ -131,6 +220,138 @@ class Denoise(Node):
                 tag=self.nlmeans_search_size_id,
                 width=185
             )
+        with dpg.group(tag=self.temporal_group_id, show=self.denoise_type == "Temporal"):
+            dpg.add_combo(
+                items=TEMPORAL_METHODS,
+                default_value=self.temporal_method,
+                callback=self.update_params,
+                tag=self.temporal_method_id,
+                width=185
+            )
+            dpg.add_input_int(
+                label="Window",
+                default_value=self.temporal_window,
+                min_value=1,
+                callback=self.update_params,
+                tag=self.temporal_window_id,
+                width=185
+            )
+            dpg.add_slider_float(
+                label="Scale",
+                default_value=self.temporal_scale,
+                min_value=0.25,
+                max_value=1.0,
+                callback=self.update_params,
+                tag=self.temporal_scale_id,
+                width=185
+            )
+            dpg.add_checkbox(
+                label="Adaptive Strength",
+                default_value=self.adaptive,
+                callback=self.update_params,
+                tag=self.adaptive_id
+            )
+            dpg.add_input_float(
+                label="Noise Level",
+                default_value=self.noise_level,
+                min_value=0.0,
+                callback=self.update_params,
+                tag=self.noise_level_id,
+                width=185
+            )
+            dpg.add_text("Estimated Noise: N/A", tag=self.estimated_noise_id)
+
+    def _nl_means(self, image: np.ndarray, template_size: int, search_size: int) -> np.ndarray:
+        return cv2.fastNlMeansDenoisingColored(
+            image,
+            None,
+            self.nlmeans_h,
+            self.nlmeans_h,
+            template_size,
+            search_size
+        ) if len(image.shape) > 2 else cv2.fastNlMeansDenoising(
+            image,
+            None,
+            self.nlmeans_h,
+            template_size,
+            search_size
+        )
+
+    def nl_means(self, image: np.ndarray, template_size: int, search_size: int) -> np.ndarray:
+        # Denoise in horizontal stripes so a parameter change can stop the run between them.
+        # Each stripe is padded by the reach of the filter so the seams match a single pass.
+        margin = search_size // 2 + template_size // 2
+        stripe = max(NL_MEANS_MIN_STRIPE, 12 * margin)
+        height = image.shape[0]
+        if height <= stripe:
+            return self._nl_means(image, template_size, search_size)
+
+        result = np.empty_like(image)
+        for top in range(0, height, stripe):
+            self.check_cancelled()
+            bottom = min(top + stripe, height)
+            padded_top, padded_bottom = max(0, top - margin), min(height, bottom + margin)
+            denoised = self._nl_means(image[padded_top:padded_bottom], template_size, search_size)
+            result[top:bottom] = denoised[top - padded_top:bottom - padded_top]
+        return result
+
+    def noise_sigma(self, frame: np.ndarray) -> float:
+        if not self.adaptive:
+            return float(self.noise_level)
+        # Measure a single channel, a gray conversion would average the noise away
+        channel = frame[:, :, 1] if len(frame.shape) == 3 else frame
+        estimate = estimate_noise(channel)
+        # Smooth the estimate so the strength doesn't flicker between frames
+        self._sigma = estimate if self._sigma is None else 0.9 * self._sigma + 0.1 * estimate
+        if dpg.does_item_exist(self.estimated_noise_id):
+            dpg.set_value(self.estimated_noise_id, f"Estimated Noise: {self._sigma:.2f}")
+        return self._sigma * float(self.noise_level)
+
+    def denoise_temporal(self, image: np.ndarray) -> np.ndarray:
+        height, width = image.shape[:2]
+        scale = min(max(float(self.temporal_scale), 0.25), 1.0)
+        frame = image
+        if scale < 1.0:
+            frame = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        # A new stream or resolution starts from scratch
+        if self._frames and self._frames[-1].shape != frame.shape:
+            self.reset_stream()
+        self._frames.append(frame)
+        sigma = self.noise_sigma(frame)
+
+        if self.temporal_method == "NL-Means Multi":
+            # Denoise the middle of the largest odd window available
+            count = len(self._frames) if len(self._frames) % 2 == 1 else len(self._frames) - 1
+            frames = list(self._frames)[-count:]
+            h = max(sigma, 0.1)
+            template_size = self.nlmeans_template_size | 1
+            search_size = self.nlmeans_search_size | 1
+            if len(frame.shape) == 3:
+                result = cv2.fastNlMeansDenoisingColoredMulti(
+                    frames, count // 2, count, None, h, h, template_size, search_size
+                )
+            else:
+                result = cv2.fastNlMeansDenoisingMulti(
+                    frames, count // 2, count, None, h, template_size, search_size
+                )
+        else:
+            # Recursive average that falls back to the new frame where it differs by more than the noise
+            current = frame.astype(np.float32)
+            if self._accumulator is None or self._accumulator.shape != current.shape:
+                self._accumulator = current
+            else:
+                difference = current - self._accumulator
+                # Motion is judged on the smoothed difference so noise alone doesn't look like motion
+                weight = np.abs(cv2.blur(difference, (5, 5)))
+                weight *= 1.0 / max(sigma, 1e-3)
+                np.clip(weight, 0.2, 1.0, out=weight)
+                self._accumulator += weight * difference
+            result = cv2.convertScaleAbs(self._accumulator)
+
+        if result.shape[:2] != (height, width):
+            result = cv2.resize(result, (width, height), interpolation=cv2.INTER_LINEAR)
+        return result
 
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         data = inputs[0]
@@ -140,6 +361,9 @@ class Denoise(Node):
         if image is None:
             return [NodePackage()]
 
+        if self.denoise_type != "Temporal" and (self._frames or self._accumulator is not None):
+            self.reset_stream()
+
         if self.denoise_type == "Gaussian Blur":
             blur_amount = self.blur_amount if self.blur_amount % 2 == 1 else self.blur_amount + 1
             result = cv2.GaussianBlur(image, (blur_amount, blur_amount), 0)
@@ -162,20 +386,9 @@ class Denoise(Node):
                          if self.nlmeans_search_size % 2 == 1 
                          else self.nlmeans_search_size + 1)
             
-            result = cv2.fastNlMeansDenoisingColored(
-                image,
-                None,
-                self.nlmeans_h,
-                self.nlmeans_h,
-                template_size,
-                search_size
-            ) if len(image.shape) > 2 else cv2.fastNlMeansDenoising(
-                image,
-                None,
-                self.nlmeans_h,
-                template_size,
-                search_size
-            )
+            result = self.nl_means(image, template_size, search_size)
+        elif self.denoise_type == "Temporal":
+            result = self.denoise_temporal(image)
             
         if result is None:
             self.on_error("No image data")
@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class EdgeDetection(Node):
+    label = "Edge Detection"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Edge Detection", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
         
@@ -82,11 +85,8 @@ class EdgeDetection(Node):
         image = data.image_or_mask
         result = None
 
-        # Convert to grayscale if needed
-        if len(image.shape) > 2:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
+        # Grayscale version, shared with other nodes reading the same package
+        gray = data.gray
 
         if self.method == "Canny":
             result = cv2.Canny(gray, self.low_threshold, self.high_threshold)
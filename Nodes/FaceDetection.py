@@ -1,39 +1,196 @@
 import cv2
-import cv2.data
 import numpy as np
 import dearpygui.dearpygui as dpg
 from NodeEditor import Node, NodePackage
+from NodeEditor.Core.Resources import ResourceHandle, resources
 
 class FaceDetection(Node):
+    label = "Face Detection"
+    catagory = "Vision"
+
     def __init__(self):
-        super().__init__("Face Detection", "Vision", 200)
+        super().__init__(max_width=200)
         self.add_input("image", "Image")
         self.add_output("mask", "Mask")
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
+        self.cascade_name = "haarcascade_frontalface_default.xml"
+        self._cascade: ResourceHandle | None = None
+
+        # UI Controls
+        self.detection_scale_id = dpg.generate_uuid()
+        self.min_face_id = dpg.generate_uuid()
+        self.max_face_id = dpg.generate_uuid()
+        self.detect_every_id = dpg.generate_uuid()
+
+        # Default values
+        self.detection_scale = 0.5  # Fraction of the input resolution the cascade runs at
+        self.min_face = 30          # Face size limits in input pixels, 0 means no limit
+        self.max_face = 0
+        self.detect_every = 1       # Run the cascade every N frames and track in between
+        self.track_threshold = 0.5
+
+        # Tracking state, boxes are in detection resolution
+        self._frame_count = 0
+        self._faces: list[tuple[int, int, int, int]] = []
+        self._patches: list[np.ndarray] = []
+        self._last_shape: tuple[int, ...] | None = None
+
+    def on_save(self) -> dict:
+        return {
+            "detection_scale": self.detection_scale,
+            "min_face": self.min_face,
+            "max_face": self.max_face,
+            "detect_every": self.detect_every,
+        }
+
+    def on_load(self, data: dict):
+        self.detection_scale = data.get("detection_scale", self.detection_scale)
+        self.min_face = data.get("min_face", self.min_face)
+        self.max_face = data.get("max_face", self.max_face)
+        self.detect_every = data.get("detect_every", self.detect_every)
+        # Show the loaded values, update_params reads every widget back
+        for tag, value in (
+            (self.detection_scale_id, self.detection_scale),
+            (self.min_face_id, self.min_face),
+            (self.max_face_id, self.max_face),
+            (self.detect_every_id, self.detect_every),
+        ):
+            if dpg.does_item_exist(tag):
+                dpg.set_value(tag, value)
+        self.update()
+
+    def on_delete(self):
+        if self._cascade is not None:
+            self._cascade.release()
+            self._cascade = None
+
+    def update_params(self):
+        self.detection_scale = dpg.get_value(self.detection_scale_id)
+        self.min_face = max(0, dpg.get_value(self.min_face_id))
+        self.max_face = max(0, dpg.get_value(self.max_face_id))
+        self.detect_every = max(1, dpg.get_value(self.detect_every_id))
+        # Force a fresh detection with the new settings
+        self._frame_count = 0
+        self.update()
+
+    def compose(self):
+        dpg.add_text("Detection Scale:")
+        dpg.add_slider_float(
+            default_value=self.detection_scale,
+            min_value=0.1,
+            max_value=1.0,
+            callback=self.update_params,
+            tag=self.detection_scale_id,
+            width=185
+        )
+        dpg.add_input_int(
+            label="Min Face",
+            default_value=self.min_face,
+            min_value=0,
+            callback=self.update_params,
+            tag=self.min_face_id,
+            width=185
+        )
+        dpg.add_input_int(
+            label="Max Face",
+            default_value=self.max_face,
+            min_value=0,
+            callback=self.update_params,
+            tag=self.max_face_id,
+            width=185
+        )
+        dpg.add_input_int(
+            label="Detect Every",
+            default_value=self.detect_every,
+            min_value=1,
+            callback=self.update_params,
+            tag=self.detect_every_id,
+            width=185
+        )
+
     def viewer(self, outputs: list[NodePackage]):
         data = outputs[0]
         img_tag = dpg.generate_uuid()
         with dpg.texture_registry():
             dpg.add_dynamic_texture(400, 400, [0.0, 0.0, 0.0, 0.0]*400*400, tag=img_tag)
-        
+
         dpg.add_image(img_tag)
-        
+
         image_rgba = data.copy_resize((400, 400), keep_alpha=True)
         image_rgba = image_rgba.astype(float)
         image_rgba /= 255
 
         dpg.set_value(img_tag, image_rgba.flatten())
 
+    def detect(self, small: np.ndarray, scale: float) -> list[tuple[int, int, int, int]]:
+        # The classifiers are loaded on first use and pooled between every Face Detection node
+        if self._cascade is None:
+            self._cascade = resources.cascade(self.cascade_name)
+
+        min_size = int(self.min_face * scale)
+        max_size = int(self.max_face * scale)
+        limits = {}
+        if min_size > 0:
+            limits["minSize"] = (min_size, min_size)
+        if max_size > 0:
+            limits["maxSize"] = (max_size, max_size)
+        with self._cascade.value.borrow() as classifier:
+            faces = classifier.detectMultiScale(small, 1.1, 4, **limits)
+        return [tuple(int(v) for v in face) for face in faces]
+
+    def track(self, small: np.ndarray) -> list[tuple[int, int, int, int]]:
+        # Follow each face by matching its last patch inside a window around its last position
+        height, width = small.shape[:2]
+        faces, patches = [], []
+        for (x, y, w, h), patch in zip(self._faces, self._patches):
+            margin_x, margin_y = w // 2, h // 2
+            x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+            x1, y1 = min(width, x + w + margin_x), min(height, y + h + margin_y)
+            roi = small[y0:y1, x0:x1]
+            if roi.shape[0] < h or roi.shape[1] < w:
+                continue
+
+            result = cv2.matchTemplate(roi, patch, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (dx, dy) = cv2.minMaxLoc(result)
+            if score < self.track_threshold:
+                continue
+
+            x, y = x0 + dx, y0 + dy
+            faces.append((x, y, w, h))
+            patches.append(small[y:y + h, x:x + w].copy())
+
+        self._patches = patches
+        return faces
+
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         data = inputs[0]
         image = data.image_or_mask
 
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        gray = data.gray
+
+        # Detect on a downscaled frame, the mask is still produced at full resolution
+        scale = min(max(float(self.detection_scale), 0.1), 1.0)
+        if scale < 1.0:
+            small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+        scale_x = small.shape[1] / gray.shape[1]
+        scale_y = small.shape[0] / gray.shape[0]
+
+        if image.shape != self._last_shape:
+            self._last_shape = image.shape
+            self._frame_count = 0
+
+        if self._frame_count % max(1, int(self.detect_every)) == 0:
+            self._faces = self.detect(small, scale)
+            self._patches = [small[y:y + h, x:x + w].copy() for (x, y, w, h) in self._faces]
+        else:
+            self._faces = self.track(small)
+        self._frame_count += 1
 
         mask = np.zeros(image.shape[:2], np.uint8)
-        for (x, y, w, h) in faces:
-            cv2.rectangle(mask, (x, y), (x+w, y+h), 255, -1)
+        for (x, y, w, h) in self._faces:
+            x0, y0 = int(x / scale_x), int(y / scale_y)
+            x1, y1 = int((x + w) / scale_x), int((y + h) / scale_y)
+            cv2.rectangle(mask, (x0, y0), (x1, y1), 255, -1)
 
         return [NodePackage(image_or_mask=mask)]
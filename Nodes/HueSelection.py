@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class HueSelection(Node):
+    label = "Hue Selection"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Hue Selection", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("mask", "mask")
         
@@ -120,8 +123,8 @@ class HueSelection(Node):
         if image is None:
             return [NodePackage()]
 
-        # Convert to HSV color space
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        # HSV version, shared with other nodes reading the same package
+        hsv = data.hsv
         
         # Create mask for the specified HSV range
         lower = np.array([self.hue_min, self.sat_min, self.val_min])
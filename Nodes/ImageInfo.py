@@ -1,11 +1,54 @@
+from dataclasses import dataclass
 import cv2
 import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
+
+@dataclass
+class ImageStats:
+    width: int
+    height: int
+    channels: int
+    dtype: str
+    min: list[float]
+    max: list[float]
+    mean: list[float]
+    std: list[float]
+    stride: int = 1  # Only every stride-th row and column was measured when > 1
+
+
+def image_stats(image: np.ndarray, stride: int = 1) -> ImageStats:
+    height, width = image.shape[:2]
+    channels = 1 if len(image.shape) == 2 else image.shape[2]
+
+    sample = image[::stride, ::stride] if stride > 1 else image
+    planes = cv2.split(sample) if channels > 1 else [sample]
+
+    # One pass for mean and standard deviation of every channel, one min/max pass per channel
+    if channels <= 4:
+        mean, std = cv2.meanStdDev(sample)
+        mean, std = mean.ravel().tolist(), std.ravel().tolist()
+    else:
+        mean = [float(cv2.mean(plane)[0]) for plane in planes]
+        std = [float(cv2.meanStdDev(plane)[1][0, 0]) for plane in planes]
+    extremes = [cv2.minMaxLoc(plane)[:2] for plane in planes]
+
+    return ImageStats(
+        width, height, channels, str(image.dtype),
+        [float(lo) for lo, _ in extremes], [float(hi) for _, hi in extremes],
+        mean, std, max(1, stride),
+    )
+
+
 class ImageInfo(Node):
+    label = "Image Info"
+    catagory = "Analysis"
+    is_sink = True
+
     def __init__(self):
-        super().__init__("Image Info", "Analysis", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
+        self.add_output("image")  # Pass through, carries the statistics as `image_stats`
         
         # UI Controls for displaying image information
         self.dimensions_id = dpg.generate_uuid()
@@ -15,6 +58,23 @@ class ImageInfo(Node):
         self.max_val_id = dpg.generate_uuid()
         self.mean_val_id = dpg.generate_uuid()
         self.std_val_id = dpg.generate_uuid()
+        self.stride_id = dpg.generate_uuid()
+
+        self.stride = 1  # Measure every Nth row and column, speeds up huge frames
+        self.stats: ImageStats | None = None
+
+    def on_save(self) -> dict:
+        return {"stride": self.stride}
+
+    def on_load(self, data: dict):
+        self.stride = data.get("stride", self.stride)
+        if dpg.does_item_exist(self.stride_id):
+            dpg.set_value(self.stride_id, self.stride)
+        self.update()
+
+    def update_params(self):
+        self.stride = max(1, dpg.get_value(self.stride_id))
+        self.update()
         
     def compose(self):
         dpg.add_text("Dimensions:", tag=self.dimensions_id)
@@ -24,6 +84,8 @@ class ImageInfo(Node):
         dpg.add_text("Max Value:", tag=self.max_val_id)
         dpg.add_text("Mean Value:", tag=self.mean_val_id)
         dpg.add_text("Std Dev:", tag=self.std_val_id)
+        dpg.add_input_int(label="Sample Stride", default_value=self.stride, min_value=1,
+                          callback=self.update_params, tag=self.stride_id, width=120)
 
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         if not inputs or inputs[0].image_or_mask is None:
@@ -35,42 +97,27 @@ class ImageInfo(Node):
             dpg.set_value(self.max_val_id, "Max Value: N/A")
             dpg.set_value(self.mean_val_id, "Mean Value: N/A")
             dpg.set_value(self.std_val_id, "Std Dev: N/A")
-            return []
+            self.stats = None
+            return [NodePackage()]
 
         image = inputs[0].image_or_mask
-        
-        # Get image properties
-        if len(image.shape) == 2:
-            height, width = image.shape
-            channels = 1
-        else:
-            height, width, channels = image.shape
+        stats = image_stats(image, self.stride)
+        self.stats = stats
+        width, height, channels = stats.width, stats.height, stats.channels
             
-        # Calculate statistics
         if channels == 1:
-            min_val = float(np.min(image))
-            max_val = float(np.max(image))
-            mean_val = float(np.mean(image))
-            std_val = float(np.std(image))
-            
             # Update UI with single channel information
-            dpg.set_value(self.min_val_id, f"Min Value: {min_val:.2f}")
-            dpg.set_value(self.max_val_id, f"Max Value: {max_val:.2f}")
-            dpg.set_value(self.mean_val_id, f"Mean Value: {mean_val:.2f}")
-            dpg.set_value(self.std_val_id, f"Std Dev: {std_val:.2f}")
+            dpg.set_value(self.min_val_id, f"Min Value: {stats.min[0]:.2f}")
+            dpg.set_value(self.max_val_id, f"Max Value: {stats.max[0]:.2f}")
+            dpg.set_value(self.mean_val_id, f"Mean Value: {stats.mean[0]:.2f}")
+            dpg.set_value(self.std_val_id, f"Std Dev: {stats.std[0]:.2f}")
         else:
-            # Calculate per-channel statistics
-            min_vals = [float(np.min(image[:,:,c])) for c in range(channels)]
-            max_vals = [float(np.max(image[:,:,c])) for c in range(channels)]
-            mean_vals = [float(np.mean(image[:,:,c])) for c in range(channels)]
-            std_vals = [float(np.std(image[:,:,c])) for c in range(channels)]
-            
             # Format channel values with proper labels (B,G,R,A)
             channel_labels = ['B', 'G', 'R', 'A'][:channels]
-            min_str = ', '.join(f'{label}:{val:.2f}' for label, val in zip(channel_labels, min_vals))
-            max_str = ', '.join(f'{label}:{val:.2f}' for label, val in zip(channel_labels, max_vals))
-            mean_str = ', '.join(f'{label}:{val:.2f}' for label, val in zip(channel_labels, mean_vals))
-            std_str = ', '.join(f'{label}:{val:.2f}' for label, val in zip(channel_labels, std_vals))
+            min_str = ', '.join(f'{label}:{val:.2f}' for label, val in zip(channel_labels, stats.min))
+            max_str = ', '.join(f'{label}:{val:.2f}' for label, val in zip(channel_labels, stats.max))
+            mean_str = ', '.join(f'{label}:{val:.2f}' for label, val in zip(channel_labels, stats.mean))
+            std_str = ', '.join(f'{label}:{val:.2f}' for label, val in zip(channel_labels, stats.std))
             
             # Update UI with multi-channel information
             dpg.set_value(self.min_val_id, f"Min Value: {min_str}")
@@ -83,4 +130,6 @@ class ImageInfo(Node):
         dpg.set_value(self.channels_id, f"Channels: {channels}")
         dpg.set_value(self.dtype_id, f"Data Type: {image.dtype}")
             
-        return inputs  # Pass through the input image
\ No newline at end of file
+        package = inputs[0]  # Pass through the input image
+        package.image_stats = stats
+        return [package]
\ No newline at end of file
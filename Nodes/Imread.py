@@ -11,10 +11,13 @@ from NodeEditor.Core.NodePackage import NodePackage
 
 
 class Imread(Node):
+    label = "Imread"
+    catagory = "Inputs"
+
     image: cv2.typing.MatLike
     
     def __init__(self):
-        super().__init__("Imread", "Inputs", 400)
+        super().__init__(max_width=400)
         self.file_path = dpg.generate_uuid()
         self.image_view = dpg.generate_uuid()
         self.image_type = dpg.generate_uuid()
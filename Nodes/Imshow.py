@@ -4,11 +4,14 @@ import uuid
 from NodeEditor import Node, NodePackage, dpg
 
 class Imshow(Node):
+    label = "Imshow"
+    catagory = "Outputs"
+    is_sink = True
     
     full_image: cv2.typing.MatLike | None = None
     
     def __init__(self) -> None:
-        super().__init__("Imshow", "Outputs", 400)
+        super().__init__(max_width=400)
         self.image_input = dpg.generate_uuid()
         self.path = dpg.generate_uuid()
         self.add_input("image")
@@ -33,7 +36,7 @@ class Imshow(Node):
         
         image = data.image_or_mask
         self.full_image = image
-        rgba_image = image if len(image.shape) == 4 else cv2.cvtColor(image, cv2.COLOR_BGR2RGBA)
+        rgba_image = data.rgba
         
         max_dim = max(image.shape[0], image.shape[1])
         max_dim = max_dim if max_dim > 400 else 400
@@ -2,37 +2,83 @@ import cv2
 import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
+ASSIGN_CHUNK = 1 << 18  # Pixels assigned per step, bounds memory and lets a stale run stop early
+
 class KMeanClustering(Node):
+    label = "K-Means Clustering"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("K-Means Clustering", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
-        
+
         # UI Controls
         self.clusters_id = dpg.generate_uuid()
         self.iterations_id = dpg.generate_uuid()
         self.epsilon_id = dpg.generate_uuid()
         self.attempts_id = dpg.generate_uuid()
-        
+        self.sample_size_id = dpg.generate_uuid()
+        self.warm_start_id = dpg.generate_uuid()
+        self.use_lut_id = dpg.generate_uuid()
+        self.lut_bits_id = dpg.generate_uuid()
+        self.refit_every_id = dpg.generate_uuid()
+
         # Default values
         self.clusters = 5
         self.iterations = 10
         self.epsilon = 1.0
         self.attempts = 3
+        self.sample_size = 20000  # Pixels the centers are fitted on, 0 fits on every pixel
+        self.warm_start = True    # Start from the previous frame's centers
+        self.use_lut = False      # Quantise new frames through a colour table baked from the centers
+        self.lut_bits = 5         # Bits per channel of the colour table, 5 gives 32x32x32 bins
+        self.refit_every = 0      # Refit the table every N frames, 0 only refits on demand
+
+        self._centers: np.ndarray | None = None
+        self._lut: np.ndarray | None = None
+        self._lut_key: tuple | None = None
+        self._frames_since_fit = 0
+        self._refit_requested = False
+        self._rng = np.random.default_rng()
 
     def on_save(self) -> dict:
         return {
             "clusters": self.clusters,
             "iterations": self.iterations,
             "epsilon": self.epsilon,
-            "attempts": self.attempts
+            "attempts": self.attempts,
+            "sample_size": self.sample_size,
+            "warm_start": self.warm_start,
+            "use_lut": self.use_lut,
+            "lut_bits": self.lut_bits,
+            "refit_every": self.refit_every,
         }
-    
+
     def on_load(self, data: dict):
         self.clusters = data["clusters"]
         self.iterations = data["iterations"]
         self.epsilon = data["epsilon"]
         self.attempts = data["attempts"]
+        self.sample_size = data.get("sample_size", self.sample_size)
+        self.warm_start = data.get("warm_start", self.warm_start)
+        self.use_lut = data.get("use_lut", self.use_lut)
+        self.lut_bits = data.get("lut_bits", self.lut_bits)
+        self.refit_every = data.get("refit_every", self.refit_every)
+        # Show the loaded values, update_params reads every widget back
+        for tag, value in (
+            (self.clusters_id, self.clusters),
+            (self.iterations_id, self.iterations),
+            (self.epsilon_id, self.epsilon),
+            (self.attempts_id, self.attempts),
+            (self.sample_size_id, self.sample_size),
+            (self.warm_start_id, self.warm_start),
+            (self.use_lut_id, self.use_lut),
+            (self.lut_bits_id, self.lut_bits),
+            (self.refit_every_id, self.refit_every),
+        ):
+            if dpg.does_item_exist(tag):
+                dpg.set_value(tag, value)
         self.update()
 
     def update_params(self):
@@ -40,15 +86,26 @@ class KMeanClustering(Node):
         self.iterations = dpg.get_value(self.iterations_id)
         self.epsilon = dpg.get_value(self.epsilon_id)
         self.attempts = dpg.get_value(self.attempts_id)
+        self.sample_size = max(0, dpg.get_value(self.sample_size_id))
+        self.warm_start = dpg.get_value(self.warm_start_id)
+        self.use_lut = dpg.get_value(self.use_lut_id)
+        self.lut_bits = dpg.get_value(self.lut_bits_id)
+        self.refit_every = max(0, dpg.get_value(self.refit_every_id))
+        # The table no longer matches the settings
+        self._refit_requested = True
+        self.update()
+
+    def refit(self):
+        self._refit_requested = True
         self.update()
 
     def compose(self):
         dpg.add_text("K-Means Parameters:")
         dpg.add_input_int(label="Clusters (K)", default_value=self.clusters,
-                         min_value=2, callback=self.update_params, 
+                         min_value=2, callback=self.update_params,
                          tag=self.clusters_id, width=185)
         dpg.add_input_int(label="Max Iterations", default_value=self.iterations,
-                         min_value=1, callback=self.update_params, 
+                         min_value=1, callback=self.update_params,
                          tag=self.iterations_id, width=185)
         dpg.add_input_float(label="Epsilon", default_value=self.epsilon,
                           min_value=0.1, callback=self.update_params,
@@ -56,30 +113,112 @@ class KMeanClustering(Node):
         dpg.add_input_int(label="Attempts", default_value=self.attempts,
                          min_value=1, callback=self.update_params,
                          tag=self.attempts_id, width=185)
+        dpg.add_input_int(label="Sample Size", default_value=self.sample_size,
+                         min_value=0, callback=self.update_params,
+                         tag=self.sample_size_id, width=185)
+        dpg.add_checkbox(label="Warm Start", default_value=self.warm_start,
+                         callback=self.update_params, tag=self.warm_start_id)
+        dpg.add_checkbox(label="Use LUT", default_value=self.use_lut,
+                         callback=self.update_params, tag=self.use_lut_id)
+        dpg.add_slider_int(label="LUT Bits", default_value=self.lut_bits,
+                          min_value=4, max_value=6, callback=self.update_params,
+                          tag=self.lut_bits_id, width=150)
+        dpg.add_input_int(label="Refit Every", default_value=self.refit_every,
+                         min_value=0, callback=self.update_params,
+                         tag=self.refit_every_id, width=185)
+        dpg.add_button(label="Refit", callback=self.refit, width=185)
+
+    def fit(self, pixels: np.ndarray) -> np.ndarray:
+        # Fit the centers on a random subsample, assignment of every pixel happens afterwards
+        if 0 < self.sample_size < len(pixels):
+            pixels = pixels[self._rng.choice(len(pixels), self.sample_size, replace=False)]
+
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER,
+                   self.iterations, self.epsilon)
+
+        previous = self._centers
+        if (self.warm_start and previous is not None
+                and previous.shape == (self.clusters, pixels.shape[1])):
+            # Seed with the previous centers so cluster order and colours stay stable
+            labels = self.assign(pixels, previous).reshape(-1, 1)
+            _, _, centers = cv2.kmeans(pixels, self.clusters, labels, criteria,  # type: ignore
+                                       1, cv2.KMEANS_USE_INITIAL_LABELS)
+        else:
+            # Attempts are run one at a time so a parameter change can stop between them
+            best_compactness, centers = None, None
+            for _ in range(max(1, self.attempts)):
+                self.check_cancelled()
+                compactness, _, attempt = cv2.kmeans(pixels, self.clusters, None, criteria,  # type: ignore
+                                                     1, cv2.KMEANS_PP_CENTERS)
+                if best_compactness is None or compactness < best_compactness:
+                    best_compactness, centers = compactness, attempt
+        return centers
+
+    @staticmethod
+    def assign(pixels: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        # Nearest center for every pixel, |p - c|^2 = |p|^2 - 2 p.c + |c|^2 without the |p|^2 term
+        distances = pixels @ (-2 * centers.T)
+        distances += np.einsum("ij,ij->i", centers, centers)
+        return np.argmin(distances, axis=1).astype(np.int32)
+
+    def build_lut(self, centers: np.ndarray, bits: int) -> np.ndarray:
+        # Map the middle of every colour bin to its nearest center once, frames then only need a lookup
+        shift = 8 - bits
+        levels = (np.arange(1 << bits, dtype=np.float32) * (1 << shift)) + (1 << shift) / 2
+        b, g, r = np.meshgrid(levels, levels, levels, indexing="ij")
+        grid = np.stack([b.ravel(), g.ravel(), r.ravel()], axis=1)
+        colours = np.uint8(np.clip(np.round(centers), 0, 255))
+        return colours[self.assign(grid, centers)]
+
+    @staticmethod
+    def apply_lut(image: np.ndarray, lut: np.ndarray, bits: int) -> np.ndarray:
+        shift = 8 - bits
+        quantised = image >> shift
+        index = quantised[..., 0].astype(np.uint32) << (2 * bits)
+        index |= quantised[..., 1].astype(np.uint32) << bits
+        index |= quantised[..., 2]
+        return lut[index]
+
+    def execute_lut(self, image: np.ndarray) -> np.ndarray:
+        bits = min(max(int(self.lut_bits), 4), 6)
+        key = (self.clusters, bits)
+        refit_due = self.refit_every > 0 and self._frames_since_fit >= self.refit_every
+        if self._lut is None or self._lut_key != key or self._refit_requested or refit_due:
+            self._refit_requested = False
+            self._frames_since_fit = 0
+            self._centers = self.fit(np.float32(image.reshape((-1, 3))))
+            self._lut = self.build_lut(self._centers, bits)
+            self._lut_key = key
+        self._frames_since_fit += 1
+        return self.apply_lut(image, self._lut, bits)
 
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         data = inputs[0]
         image = data.image_or_mask
-        
+
         if image is None:
             return [NodePackage()]
-        
+
+        if self.use_lut and len(image.shape) == 3 and image.shape[2] == 3 and image.dtype == np.uint8:
+            return [NodePackage(image_or_mask=self.execute_lut(image))]
+
         # Reshape the image for k-means
-        Z = image.reshape((-1, 3))
+        channels = image.shape[2] if len(image.shape) == 3 else 1
+        Z = image.reshape((-1, channels))
         Z = np.float32(Z)
-        
-        # Define criteria and apply kmeans
-        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 
-                   self.iterations, self.epsilon)
-        
-        _, labels, centers = cv2.kmeans(Z, self.clusters, None, criteria,  # type: ignore
-                                      self.attempts, cv2.KMEANS_RANDOM_CENTERS) # type: ignore
-        
+
+        centers = self.fit(Z)
+        self._centers = centers
+        labels = np.empty(len(Z), dtype=np.int32)
+        for start in range(0, len(Z), ASSIGN_CHUNK):
+            self.check_cancelled()
+            labels[start:start + ASSIGN_CHUNK] = self.assign(Z[start:start + ASSIGN_CHUNK], centers)
+
         # Convert back to uint8 and reshape
-        centers = np.uint8(centers)
-        segmented = centers[labels.flatten()] # type: ignore
+        centers = np.uint8(np.clip(np.round(centers), 0, 255))
+        segmented = centers[labels] # type: ignore
         result = segmented.reshape(image.shape)
-        
+
         return [NodePackage(image_or_mask=result)]
 
     def viewer(self, outputs: list[NodePackage]):
@@ -87,11 +226,11 @@ class KMeanClustering(Node):
         img_tag = dpg.generate_uuid()
         with dpg.texture_registry():
             dpg.add_dynamic_texture(400, 400, [0.0, 0.0, 0.0, 0.0]*400*400, tag=img_tag)
-        
+
         dpg.add_image(img_tag)
-        
+
         image_rgba = data.copy_resize((400, 400), keep_alpha=True)
         image_rgba = image_rgba.astype(float)
         image_rgba /= 255
 
-        dpg.set_value(img_tag, image_rgba.flatten())
\ No newline at end of file
+        dpg.set_value(img_tag, image_rgba.flatten())
@@ -1,13 +1,17 @@
 import cv2
 import numpy as np
 import dearpygui.dearpygui as dpg
-from NodeEditor import Node, NodePackage
+from NodeEditor import ContourPackage, Node, NodePackage
 
 class MaskPlot(Node):
+    label = "Mask Plot"
+    catagory = "Vision"
+
     def __init__(self):
-        super().__init__("Mask Plot", "Vision", 200)
+        super().__init__(max_width=200)
         self.add_input("image", "Image")
-        self.add_input("mask", "Mask")
+        self.add_input("mask", "Mask", optional=True)
+        self.add_input("contours", "contours", optional=True)
         self.add_output("image", "Image")
         self.color = [255, 0, 0]  # Default color: Red
         self.color_picker = dpg.generate_uuid()
@@ -21,21 +25,30 @@ class MaskPlot(Node):
 
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         image_data = inputs[0]
-        mask_data = inputs[1]
+        mask_data = inputs[1] if inputs[1] is not None else inputs[2]
 
         image = image_data.image_or_mask
-        mask = mask_data.image_or_mask
-
-        # Ensure mask is the same size as the image
-        mask = cv2.resize(mask, (image.shape[1], image.shape[0]))
 
-        # Convert grayscale mask to BGR
-        if len(mask.shape) == 2:
-            mask_bgr = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
+        if mask_data is None:
+            self.on_error("No mask or contours connected")
+            return [image_data]
+
+        if isinstance(mask_data, ContourPackage) and "image_or_mask" not in mask_data.__dict__:
+            # Use the polygons directly, scaled to the image instead of drawing and tracing a mask
+            contours, _ = mask_data.contours()
+            scale = np.array([image.shape[1] / mask_data.frame_shape[1],
+                              image.shape[0] / mask_data.frame_shape[0]])
+            if (scale != 1).any():
+                contours = [np.round(c * scale).astype(np.int32) for c in contours]
         else:
-            mask_bgr = mask  # Assume it's already BGR
+            mask = mask_data.image_or_mask
+
+            # Ensure mask is the same size as the image
+            if mask.shape[:2] != image.shape[:2]:
+                mask_data = NodePackage(image_or_mask=cv2.resize(mask, (image.shape[1], image.shape[0])))
+
+            # Create a outline of the mask on the image, the contours are shared with other nodes
+            contours, _ = mask_data.contours(cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-        # Create a outline of the mask on the image
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         cv2.drawContours(image, contours, -1, self.color, 2)
         return [NodePackage(image_or_mask=image)]
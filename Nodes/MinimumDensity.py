@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class MinimumDensity(Node):
+    label = "Minimum Density"
+    catagory = "Analysis"
+
     def __init__(self):
-        super().__init__("Minimum Density", "Analysis", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("mask", "mask")
         
@@ -68,17 +71,8 @@ class MinimumDensity(Node):
         if image is None:
             return [NodePackage()]
 
-        # Convert to binary if needed
-        if len(image.shape) > 2:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
-        else:
-            _, binary = cv2.threshold(image, 127, 255, cv2.THRESH_BINARY)
-
-        # Get connected components with stats
-        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(
-            binary, connectivity=8
-        )
+        # Get connected components of the binary image, shared with other nodes analysing the same package
+        num_labels, labels, stats, _ = data.components(connectivity=8, threshold=127)
 
         # Get component sizes (excluding background)
         component_sizes = stats[1:, cv2.CC_STAT_AREA]
@@ -91,22 +85,17 @@ class MinimumDensity(Node):
         dpg.configure_item(self.avg_density_id, 
                          label=f"Average Component Size: {self.avg_density:.1f}")
 
-        # Create output mask
-        result = np.zeros_like(binary)
-        
         # Calculate threshold value
         threshold_value = (self.threshold * self.avg_density 
                          if self.use_relative_threshold 
                          else self.threshold)
 
-        # Apply density filtering
-        for i in range(1, num_labels):  # Skip background (label 0)
-            if self.invert:
-                if stats[i, cv2.CC_STAT_AREA] < threshold_value:
-                    result[labels == i] = 255
-            else:
-                if stats[i, cv2.CC_STAT_AREA] >= threshold_value:
-                    result[labels == i] = 255
+        # Decide once per component, then paint every pixel with a single lookup
+        areas = stats[:, cv2.CC_STAT_AREA]
+        keep = areas < threshold_value if self.invert else areas >= threshold_value
+        keep[0] = False  # Background
+        lut = np.where(keep, 255, 0).astype(np.uint8)
+        result = lut[labels]
 
         return [NodePackage(image_or_mask=result)]
 
@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class Morphological(Node):
+    label = "Morphological"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Morphological", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("Mask", "mask")
         self.add_output("Mask", "mask")
         
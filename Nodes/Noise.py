@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class Noise(Node):
+    label = "Noise"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Noise", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
 
@@ -12,11 +15,45 @@ class Noise(Node):
         self.noise_amount_input = dpg.generate_uuid()
         self.noise_density_input = dpg.generate_uuid()
         self.noise_stddev_input = dpg.generate_uuid()
+        self.seed_input = dpg.generate_uuid()
 
         self.noise_type = "Gaussian"
         self.noise_amount = 50
         self.noise_density = 0.05
         self.noise_stddev = 25
+        self.seed = -1  # Fixed seed for reproducible noise, -1 draws new noise every run
+
+        # Noise is drawn into reused buffers, only the output image is allocated per frame
+        self._rng = np.random.default_rng()
+        self._gaussian_buffer: np.ndarray | None = None
+        self._uniform_buffer: np.ndarray | None = None
+
+    def on_save(self) -> dict:
+        return {
+            "noise_type": self.noise_type,
+            "noise_density": self.noise_density,
+            "noise_stddev": self.noise_stddev,
+            "seed": self.seed,
+        }
+
+    def on_load(self, data: dict):
+        self.noise_type = data.get("noise_type", self.noise_type)
+        self.noise_density = data.get("noise_density", self.noise_density)
+        self.noise_stddev = data.get("noise_stddev", self.noise_stddev)
+        self.seed = data.get("seed", self.seed)
+        # Show the loaded values, update_noise reads every widget back
+        for tag, value in (
+            (self.noise_type_id, self.noise_type),
+            (self.noise_stddev_input, self.noise_stddev),
+            (self.noise_density_input, self.noise_density),
+            (self.seed_input, self.seed),
+        ):
+            if dpg.does_item_exist(tag):
+                dpg.set_value(tag, value)
+        if dpg.does_item_exist(self.noise_stddev_input):
+            dpg.configure_item(self.noise_stddev_input, show=self.noise_type == "Gaussian")
+            dpg.configure_item(self.noise_density_input, show=self.noise_type == "Salt & Pepper")
+        self.update()
 
     def viewer(self, outputs: list[NodePackage]):
         data = outputs[0]
@@ -48,6 +85,9 @@ class Noise(Node):
                            callback=self.update_noise, tag=self.noise_density_input, 
                            width=185, show=self.noise_type=="Salt & Pepper")
 
+        dpg.add_input_int(label="Seed", default_value=self.seed, min_value=-1,
+                          callback=self.update_noise, tag=self.seed_input, width=140)
+
     def update_noise(self):
         self.noise_type = dpg.get_value(self.noise_type_id)
         
@@ -58,35 +98,43 @@ class Noise(Node):
         # Always update both values
         self.noise_stddev = dpg.get_value(self.noise_stddev_input)
         self.noise_density = dpg.get_value(self.noise_density_input)
+        self.seed = max(-1, dpg.get_value(self.seed_input))
         
         self.update()
 
+    def _buffer(self, buffer: np.ndarray | None, shape: tuple[int, ...], dtype) -> np.ndarray:
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype)
+        return buffer
+
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         data = inputs[0]
-        image = data.image_or_mask.copy()
+        image = data.image_or_mask
+
+        # OpenCV's generator is per thread, seed it from this node's generator so runs are reproducible
+        rng = np.random.default_rng(self.seed) if self.seed >= 0 else self._rng
+        cv2.setRNGSeed(int(rng.integers(2**31 - 1)))
 
         if self.noise_type == "Gaussian":
-            mean = 0
-            noise = np.random.normal(mean, max(1, self.noise_stddev), image.shape)
-            noisy_image = image + noise
-            noisy_image = np.clip(noisy_image, 0, 255).astype(np.uint8)
+            # Saturating add of int16 noise, no float64 temporaries
+            self._gaussian_buffer = self._buffer(self._gaussian_buffer, image.shape, np.int16)
+            channels = image.shape[2] if len(image.shape) == 3 else 1
+            # Mean and deviation must be given per channel, a scalar only fills the first one
+            cv2.randn(self._gaussian_buffer, (0,) * channels, (max(1, self.noise_stddev),) * channels)
+            noisy_image = cv2.add(image, self._gaussian_buffer, dtype=cv2.CV_8U)
             
         elif self.noise_type == "Salt & Pepper":
             noisy_image = image.copy()
             # Ensure we have a valid density value
             density = float(self.noise_density) if self.noise_density is not None else 0.05
-            
-            # Salt noise (white pixels)
-            salt_prob = density / 2
-            salt_mask = np.random.random(image.shape[:2]) < salt_prob
-            noisy_image[salt_mask] = 255
-            
-            # Pepper noise (black pixels)
-            pepper_prob = density / 2
-            pepper_mask = np.random.random(image.shape[:2]) < pepper_prob
-            noisy_image[pepper_mask] = 0
+
+            # One uniform draw decides both salt (white) and pepper (black) pixels
+            self._uniform_buffer = self._buffer(self._uniform_buffer, image.shape[:2], np.float32)
+            cv2.randu(self._uniform_buffer, 0, 1)
+            noisy_image[self._uniform_buffer < density / 2] = 255
+            noisy_image[self._uniform_buffer > 1 - density / 2] = 0
             
         else:
-            noisy_image = image
+            noisy_image = image.copy()
 
         return [NodePackage(image_or_mask=noisy_image)]
@@ -6,8 +6,12 @@ from NodeEditor.Core.Node import Node
 from NodeEditor.Core.NodePackage import NodePackage
 
 class RGBHistogram(Node):
+    label = "RGB Histogram"
+    catagory = "Analysis"
+    is_sink = True
+
     def __init__(self):
-        super().__init__("RGB Histogram", "Analysis", 400)
+        super().__init__(max_width=400)
         self.add_input("image")
 
         # UI controls
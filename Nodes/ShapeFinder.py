@@ -1,13 +1,17 @@
 import cv2
 import numpy as np
-from NodeEditor import Node, NodePackage, dpg
+from NodeEditor import Contour, ContourPackage, Node, NodePackage, dpg
 
 class ShapeFinder(Node):
+    label = "Shape Finder"
+    catagory = "Analysis"
+
     def __init__(self):
-        super().__init__("Shape Finder", "Analysis", 200)
+        super().__init__(max_width=200)
         self.add_input("image")
         self.add_output("image")
         self.add_output("mask")
+        self.add_output("contours", "contours")
         
         # UI Controls
         self.min_area_id = dpg.generate_uuid()
@@ -130,23 +134,16 @@ class ShapeFinder(Node):
         image = data.image_or_mask
         
         if image is None:
-            return [NodePackage(), NodePackage()]
-
-        # Convert to grayscale if needed
-        if len(image.shape) > 2:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
+            return [NodePackage(), NodePackage(), ContourPackage()]
 
-        # Create a binary image
-        _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
-        
-        # Find contours
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Find contours of the binary image, shared with other nodes analysing the same package
+        contours, _ = data.contours(cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, threshold=127)
         
-        # Create mask and visualization image
-        mask = np.zeros_like(gray)
-        result = image.copy() if len(image.shape) > 2 else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        # Create visualization image unless nothing reads it, the mask is only drawn if a consumer reads its pixels
+        shapes = []
+        result = None
+        if self.output_demanded(0):
+            result = image.copy() if len(image.shape) > 2 else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
         
         for contour in contours:
             area = cv2.contourArea(contour)
@@ -158,25 +155,31 @@ class ShapeFinder(Node):
                 
                 vertices = len(approx)
                 if self.min_vertices <= vertices <= self.max_vertices:
-                    # Draw on mask
-                    cv2.drawContours(mask, [approx], -1, 255, -1 if self.fill_shapes else 2) # type: ignore
+                    shape = Contour.from_points(approx)
+                    shapes.append(shape)
                     
                     # Draw on result image
+                    if result is None:
+                        continue
                     if self.draw_contours:
-                        cv2.drawContours(result, [approx], -1, (0, 255, 0), 2)
+                        cv2.drawContours(result, [shape.points], -1, (0, 255, 0), 2)
                     
-                    if self.draw_centroids:
-                        M = cv2.moments(approx)
-                        if M["m00"] != 0:
-                            cx = int(M["m10"] / M["m00"])
-                            cy = int(M["m01"] / M["m00"])
-                            cv2.circle(result, (cx, cy), 5, (255, 0, 0), -1)
+                    if self.draw_centroids and shape.centroid is not None:
+                        cx, cy = shape.centroid
+                        cv2.circle(result, (int(cx), int(cy)), 5, (255, 0, 0), -1)
+
+        polygons = ContourPackage(
+            polygons=shapes,
+            frame_shape=image.shape[:2],
+            thickness=-1 if self.fill_shapes else 2,
+        )
         
-        return [NodePackage(image_or_mask=result), NodePackage(image_or_mask=mask)]
+        visualization = NodePackage() if result is None else NodePackage(image_or_mask=result)
+        return [visualization, polygons, polygons]
 
     def viewer(self, outputs: list[NodePackage]):
         # Display both the result image and the mask
-        for i, data in enumerate(outputs):
+        for i, data in enumerate(outputs[:2]):
             img_tag = dpg.generate_uuid()
             with dpg.texture_registry():
                 dpg.add_dynamic_texture(400, 400, [0.0, 0.0, 0.0, 0.0]*400*400, tag=img_tag)
@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class SolidColor(Node):
+    label = "Solid Color"
+    catagory = "Inputs"
+
     def __init__(self):
-        super().__init__("Solid Color", "Inputs", 200)
+        super().__init__(max_width=200)
         self.add_output("image")
         
         # UI Controls
@@ -2,11 +2,16 @@ import cv2
 import numpy as np
 import dearpygui.dearpygui as dpg
 from NodeEditor import Node, NodePackage
+from NodeEditor.Core.Resources import ResourceHandle, resources
 import os
 
 class TemplateCreator(Node):
+    label = "Template Creator"
+    catagory = "Analytics"
+    is_sink = True
+
     def __init__(self):
-        super().__init__("Template Creator", "Analytics", 250)
+        super().__init__(max_width=250)
         self.add_input("image", "image")
         self.add_output("image", "image")
         self.add_output("template", "template")
@@ -29,6 +34,8 @@ class TemplateCreator(Node):
         self.template_name = "template1"
         self.templates_dir = "templates"
         self.templates_list = []
+        self.current_template = None
+        self._template: ResourceHandle | None = None
         
         # Create templates directory if it doesn't exist
         if not os.path.exists(self.templates_dir):
@@ -111,6 +118,8 @@ class TemplateCreator(Node):
             
             save_path = os.path.join(self.templates_dir, self.template_name)
             cv2.imwrite(save_path, self.current_template)
+            # Overwriting a template leaves the directory untouched, mark it so template libraries reload
+            os.utime(self.templates_dir)
             
             # Update templates list
             self.update_templates_list()
@@ -121,9 +130,19 @@ class TemplateCreator(Node):
         if selected:
             template_path = os.path.join(self.templates_dir, selected)
             if os.path.exists(template_path):
-                self.current_template = cv2.imread(template_path)
+                # Templates are read once and shared with every node using the same file
+                template = resources.template(template_path)
+                if self._template is not None:
+                    self._template.release()
+                self._template = template
+                self.current_template = template.value
                 self.update()
 
+    def on_delete(self):
+        if self._template is not None:
+            self._template.release()
+            self._template = None
+
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
         if not inputs or inputs[0].image_or_mask is None:
             return [NodePackage(), NodePackage()]
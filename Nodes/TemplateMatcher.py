@@ -1,36 +1,456 @@
+import os
+import time
+import hashlib
+import threading
+import concurrent.futures as future
+from collections import OrderedDict
+from dataclasses import dataclass
+
 import cv2
 import numpy as np
 import dearpygui.dearpygui as dpg
 from NodeEditor import Node, NodePackage
+from NodeEditor.Core.Governor import governor
+from NodeEditor.Core.Resources import ResourceHandle, resources
+
+METHODS = {
+    "TM_CCOEFF_NORMED": cv2.TM_CCOEFF_NORMED,
+    "TM_CCORR_NORMED": cv2.TM_CCORR_NORMED,
+    "TM_SQDIFF_NORMED": cv2.TM_SQDIFF_NORMED,
+}
+
+# Coarse pyramid levels score lower than full resolution, so candidates get some slack
+COARSE_SLACK = 0.2
+# Smallest template side (in pixels) still worth matching on a pyramid level
+MIN_TEMPLATE_SIZE = 8
+MAX_PYRAMID_LEVELS = 4
+TEMPLATE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Library templates are matched in parallel, cv2 releases the GIL while matching
+_library_executor: future.ThreadPoolExecutor | None = None
+_library_workers = 0
+_library_executor_lock = threading.Lock()
+# Bumped by refresh_library() to reload template libraries whose directory looks unchanged
+_library_generation = 0
+
+
+def build_pyramid(image: np.ndarray, levels: int) -> list[np.ndarray]:
+    pyramid = [image]
+    for _ in range(levels):
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+def usable_levels(template_shape: tuple[int, ...], image_shape: tuple[int, ...], levels: int) -> int:
+    th, tw = template_shape[:2]
+    ih, iw = image_shape[:2]
+    level = 0
+    while (level < levels
+           and min(th, tw) >> (level + 1) >= MIN_TEMPLATE_SIZE
+           and min(ih - th, iw - tw) >> (level + 1) > 0):
+        level += 1
+    return level
+
+
+def spectrum(array: np.ndarray, size: tuple[int, int], zero_mean: bool = False) -> tuple[np.ndarray, float]:
+    """Packed (CCS) spectrum of `array` zero padded to `size`, and its sum of squares."""
+    values = array.astype(np.float32)
+    if zero_mean:
+        values -= values.mean()
+    padded = np.zeros(size, np.float32)
+    padded[:values.shape[0], :values.shape[1]] = values
+    return cv2.dft(padded, nonzeroRows=values.shape[0]), float(cv2.norm(values, cv2.NORM_L2SQR))
+
+
+class SpectrumCache:
+    """
+    LRU of template DFT spectra, bounded by memory since they are padded to the frame size.
+
+    Templates are matched against every frame of a stream at the same sizes, so their spectra
+    are reused. Frames never come back and are not kept here, see `FrameSpectra`.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._entries: OrderedDict[tuple, tuple[np.ndarray, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, template: np.ndarray, size: tuple[int, int], zero_mean: bool = False) -> tuple[np.ndarray, float]:
+        digest = hashlib.blake2b(np.ascontiguousarray(template).tobytes(), digest_size=16).digest()
+        key = (digest, template.shape, size, zero_mean)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        entry = spectrum(template, size, zero_mean)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self._bytes += entry[0].nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return entry
+
+
+_spectra = SpectrumCache()
+
+
+class FrameSpectra:
+    """
+    Spectra of one frame and its pyramid levels, computed once per execution and shared by
+    every template matched against it.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple, tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, image: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+        key = (id(image), size)
+        # Held while computing so parallel templates wait for the first one instead of repeating it
+        with self._lock:
+            if key not in self._entries:
+                # The image is kept alongside so its id can't be reused while the entry exists
+                self._entries[key] = (image, spectrum(image, size)[0])
+            return self._entries[key][1]
+
+
+def fft_match(image: np.ndarray, template: np.ndarray, method: int,
+              frame: FrameSpectra | None = None) -> np.ndarray:
+    """
+    Frequency-domain equivalent of `cv2.matchTemplate` for the normed methods. `frame` holds
+    the spectra of the frame `image` belongs to, without it nothing is cached.
+    """
+    ih, iw = image.shape[:2]
+    th, tw = template.shape[:2]
+    oh, ow = ih - th + 1, iw - tw + 1
+    size = (cv2.getOptimalDFTSize(ih), cv2.getOptimalDFTSize(iw))
+
+    # Correlation is computed against the zero-mean template for CCOEFF
+    zero_mean = method == cv2.TM_CCOEFF_NORMED
+    if frame is None:
+        # A refinement window, neither it nor the template at its size come back
+        templ_spectrum, templ_sq = spectrum(template, size, zero_mean)
+        image_spectrum, _ = spectrum(image, size)
+    else:
+        templ_spectrum, templ_sq = _spectra.get(template, size, zero_mean)
+        image_spectrum = frame.get(image, size)
+
+    product = cv2.mulSpectrums(image_spectrum, templ_spectrum, 0, conjB=True)
+    corr = cv2.idft(product, flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE)[:oh, :ow].astype(np.float64)
+
+    # Window sums from integral images
+    sums, sq_sums = cv2.integral2(image, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+    window = lambda s: s[th:, tw:] - s[:oh, tw:] - s[th:, :ow] + s[:oh, :ow]
+    window_sq = window(sq_sums)
+
+    if method == cv2.TM_CCOEFF_NORMED:
+        window_sq = window_sq - window(sums) ** 2 / (th * tw)
+        numerator = corr
+    elif method == cv2.TM_SQDIFF_NORMED:
+        numerator = window_sq - 2 * corr + templ_sq
+    else:
+        numerator = corr
+    denominator = np.sqrt(np.maximum(window_sq, 0) * templ_sq)
+
+    # Same handling of flat windows as OpenCV
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(np.abs(numerator) < denominator, numerator / denominator, 0.0)
+    saturated = (np.abs(numerator) >= denominator) & (np.abs(numerator) < denominator * 1.125)
+    result[saturated] = np.sign(numerator[saturated])
+    if method == cv2.TM_SQDIFF_NORMED:
+        result[np.abs(numerator) >= denominator * 1.125] = 1.0
+    return result.astype(np.float32)
+
+
+class AlgorithmSelector:
+    """
+    Picks the faster matching backend per (image size, template size, method).
+
+    Sizes are bucketed by half octaves of area. The first match in a bucket runs both backends
+    and times them, and later matches in the bucket reuse the winner.
+    """
+
+    def __init__(self) -> None:
+        self._choices: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket(image_shape: tuple[int, ...], template_shape: tuple[int, ...], method: int) -> tuple:
+        area = lambda shape: int(2 * np.log2(max(1, shape[0] * shape[1])))
+        return area(image_shape), area(template_shape), method
+
+    def choices(self) -> dict[tuple, str]:
+        with self._lock:
+            return dict(self._choices)
+
+    def match(self, image: np.ndarray, template: np.ndarray, method: int,
+              frame: FrameSpectra | None = None) -> np.ndarray:
+        key = self.bucket(image.shape, template.shape, method)
+        with self._lock:
+            choice = self._choices.get(key)
+        if choice == "spatial":
+            return cv2.matchTemplate(image, template, method)
+        if choice == "fft":
+            return fft_match(image, template, method, frame)
+
+        # First time in this bucket, the FFT run also fills the spectrum caches before timing
+        fft_match(image, template, method, frame)
+        s_time = time.perf_counter()
+        result = cv2.matchTemplate(image, template, method)
+        spatial_time = time.perf_counter() - s_time
+        s_time = time.perf_counter()
+        fft_match(image, template, method, frame)
+        fft_time = time.perf_counter() - s_time
+
+        with self._lock:
+            self._choices[key] = "fft" if fft_time < spatial_time else "spatial"
+        return result
+
+
+_selector = AlgorithmSelector()
+
+
+def match(image: np.ndarray, template: np.ndarray, method: int, backend: str = "Auto",
+          frame: FrameSpectra | None = None) -> np.ndarray:
+    """Similarity map where higher is always better."""
+    if backend == "FFT":
+        result = fft_match(image, template, method, frame)
+    elif backend == "Spatial":
+        result = cv2.matchTemplate(image, template, method)
+    else:
+        result = _selector.match(image, template, method, frame)
+    if method == cv2.TM_SQDIFF_NORMED:
+        result = 1.0 - result
+    return result
+
+
+def peaks(scores: np.ndarray, threshold: float, limit: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Local maxima above the threshold, best `limit` first
+    local_max = scores >= cv2.dilate(scores, np.ones((3, 3), np.uint8))
+    ys, xs = np.nonzero(local_max & (scores >= threshold))
+    values = scores[ys, xs]
+    if len(values) > limit:
+        best = np.argpartition(-values, limit)[:limit]
+        xs, ys, values = xs[best], ys[best], values[best]
+    order = np.argsort(-values, kind="stable")
+    return xs[order], ys[order], values[order]
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, overlap: float, limit: int) -> np.ndarray:
+    """Greedy NMS over (x, y, w, h) boxes, returns the indices to keep in score order."""
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size and len(keep) < limit:
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        intersection = w * h
+        iou = intersection / (areas[i] + areas[rest] - intersection)
+        order = rest[iou <= overlap]
+    return np.array(keep, dtype=np.int64)
+
+
+def find_matches(image_pyramid: list[np.ndarray], template_pyramid: list[np.ndarray], method: int,
+                 threshold: float, max_matches: int, overlap: float = 0.3,
+                 backend: str = "Auto", frame: FrameSpectra | None = None) -> list[tuple[int, int, float]]:
+    """
+    Coarse-to-fine template search.
+
+    The template is matched on the coarsest usable pyramid level, and only the windows around
+    the coarse candidates are matched again at full resolution. Returns (x, y, score) tuples.
+    `frame` shares the spectra of the image pyramid between the templates matched against it.
+    """
+    image, template = image_pyramid[0], template_pyramid[0]
+    ih, iw = image.shape[:2]
+    th, tw = template.shape[:2]
+    if th > ih or tw > iw:
+        return []
+
+    limit = max(1, max_matches) * 20
+    level = min(usable_levels(template.shape, image.shape, len(template_pyramid) - 1),
+                len(image_pyramid) - 1)
+
+    if level == 0:
+        xs, ys, scores = peaks(match(image, template, method, backend, frame), threshold, limit)
+    else:
+        coarse = match(image_pyramid[level], template_pyramid[level], method, backend, frame)
+        cxs, cys, _ = peaks(coarse, threshold - COARSE_SLACK, limit)
+
+        # Refine each candidate in a small full resolution window
+        factor = 2 ** level
+        xs, ys, scores = [], [], []
+        for cx, cy in zip(cxs, cys):
+            x0, y0 = max(0, cx * factor - factor), max(0, cy * factor - factor)
+            x1, y1 = min(iw - tw, cx * factor + factor), min(ih - th, cy * factor + factor)
+            window = image[y0:y1 + th, x0:x1 + tw]
+            _, score, _, (dx, dy) = cv2.minMaxLoc(match(window, template, method, backend))
+            xs.append(x0 + dx)
+            ys.append(y0 + dy)
+            scores.append(score)
+        xs, ys, scores = np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64), np.array(scores)
+
+    found = scores >= threshold
+    xs, ys, scores = xs[found], ys[found], scores[found]
+    boxes = np.stack([xs, ys, np.full_like(xs, tw), np.full_like(xs, th)], axis=1)
+    keep = non_max_suppression(boxes, scores, overlap, max_matches)
+    return [(int(xs[i]), int(ys[i]), float(scores[i])) for i in keep]
+
+
+@dataclass
+class LibraryTemplate:
+    name: str
+    pyramid: list[np.ndarray]  # Grayscale template and its pyramid levels
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.pyramid[0].shape
+
+
+def library_executor(workers: int) -> future.ThreadPoolExecutor:
+    """Shared pool with at least `workers` threads, grown when the governor's budget is raised."""
+    global _library_executor, _library_workers
+    with _library_executor_lock:
+        if _library_executor is None or _library_workers < workers:
+            if _library_executor is not None:
+                _library_executor.shutdown(wait=False)
+            _library_executor = future.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="template-library")
+            _library_workers = workers
+        return _library_executor
+
+
+def refresh_library():
+    """Reload every template library, e.g. after a template file was edited in place."""
+    global _library_generation
+    _library_generation += 1
+
+
+def library_key(directory: str) -> tuple | None:
+    """
+    Registry key of the library in `directory`. Adding, removing or renaming a template changes
+    the directory's mtime and so the key, a single stat per frame instead of listing the files.
+    """
+    try:
+        modified = os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+    return "template_library", os.path.abspath(directory), modified, _library_generation
+
+
+def load_library(key: tuple) -> ResourceHandle:
+    """Grayscale pyramids of every template in the keyed directory, shared through the resource registry."""
+    directory = key[1]
+
+    def load():
+        files = sorted(f for f in os.listdir(directory) if f.lower().endswith(TEMPLATE_EXTENSIONS))
+        library = []
+        for file in files:
+            template = cv2.imread(os.path.join(directory, file), cv2.IMREAD_GRAYSCALE)
+            if template is None:
+                continue
+            levels = usable_levels(template.shape, (1 << 16, 1 << 16), MAX_PYRAMID_LEVELS)
+            library.append(LibraryTemplate(os.path.splitext(file)[0], build_pyramid(template, levels)))
+        return library
+
+    return resources.acquire(key, load)
+
 
 class TemplateMatcher(Node):
+    label = "Template Matcher"
+    catagory = "Analytics"
+
     def __init__(self):
-        super().__init__("Template Matcher", "Analytics", 250)
+        super().__init__(max_width=250)
         self.add_input("image", "image")
-        self.add_input("template", "template")
+        self.add_input("template", "template", optional=True)
         self.add_output("image", "Visualization")
         self.add_output("mask", "mask")
-        
+
         # UI Controls
         self.method_id = dpg.generate_uuid()
         self.threshold_id = dpg.generate_uuid()
         self.max_matches_id = dpg.generate_uuid()
-        
+        self.pyramid_levels_id = dpg.generate_uuid()
+        self.source_id = dpg.generate_uuid()
+        self.backend_id = dpg.generate_uuid()
+
         # Default values
         self.method = cv2.TM_CCOEFF_NORMED
         self.threshold = 0.8
         self.max_matches = 3
-        
+        self.pyramid_levels = 2
+        self.overlap = 0.3  # IoU above which overlapping matches are merged
+        self.source = "Connected Template"
+        self.backend = "Auto"  # Spatial or FFT correlation, Auto benchmarks and picks the faster
+        self.templates_dir = "templates"
+        self._library: ResourceHandle | None = None
+
+    def on_save(self) -> dict:
+        return {
+            "method": next(name for name, value in METHODS.items() if value == self.method),
+            "threshold": self.threshold,
+            "max_matches": self.max_matches,
+            "pyramid_levels": self.pyramid_levels,
+            "source": self.source,
+            "backend": self.backend,
+        }
+
+    def on_load(self, data: dict):
+        self.method = METHODS.get(data.get("method", ""), self.method)
+        self.threshold = data.get("threshold", self.threshold)
+        self.max_matches = data.get("max_matches", self.max_matches)
+        self.pyramid_levels = data.get("pyramid_levels", self.pyramid_levels)
+        self.source = data.get("source", self.source)
+        self.backend = data.get("backend", self.backend)
+        # Show the loaded values, update_params reads every widget back
+        for tag, value in (
+            (self.method_id, next(name for name, value in METHODS.items() if value == self.method)),
+            (self.threshold_id, self.threshold),
+            (self.max_matches_id, self.max_matches),
+            (self.pyramid_levels_id, self.pyramid_levels),
+            (self.source_id, self.source),
+            (self.backend_id, self.backend),
+        ):
+            if dpg.does_item_exist(tag):
+                dpg.set_value(tag, value)
+        self.update()
+
+    def on_delete(self):
+        if self._library is not None:
+            self._library.release()
+            self._library = None
+
     def compose(self):
+        dpg.add_text("Templates:")
+        dpg.add_combo(
+            items=["Connected Template", "Template Library"],
+            default_value=self.source,
+            callback=self.update_params,
+            tag=self.source_id,
+            width=185
+        )
+        dpg.add_button(label="Reload Templates", callback=self.reload_templates, width=185)
+
         dpg.add_text("Match Method:")
         dpg.add_combo(
-            items=["TM_CCOEFF_NORMED", "TM_CCORR_NORMED", "TM_SQDIFF_NORMED"],
-            default_value="TM_CCOEFF_NORMED",
+            items=list(METHODS.keys()),
+            default_value=next(name for name, value in METHODS.items() if value == self.method),
             callback=self.update_params,
             tag=self.method_id,
             width=185
         )
-        
+
         dpg.add_text("Threshold:")
         dpg.add_slider_float(
             default_value=self.threshold,
@@ -40,7 +460,7 @@ class TemplateMatcher(Node):
             tag=self.threshold_id,
             width=185
         )
-        
+
         dpg.add_text("Max Matches:")
         dpg.add_input_int(
             default_value=self.max_matches,
@@ -51,75 +471,144 @@ class TemplateMatcher(Node):
             width=185
         )
 
+        dpg.add_text("Pyramid Levels:")
+        dpg.add_input_int(
+            default_value=self.pyramid_levels,
+            min_value=0,
+            max_value=4,
+            callback=self.update_params,
+            tag=self.pyramid_levels_id,
+            width=185
+        )
+
+        dpg.add_text("Backend:")
+        dpg.add_combo(
+            items=["Auto", "Spatial", "FFT"],
+            default_value=self.backend,
+            callback=self.update_params,
+            tag=self.backend_id,
+            width=185
+        )
+
+    def reload_templates(self):
+        refresh_library()
+        self.update()
+
     def update_params(self):
         method_text = dpg.get_value(self.method_id)
-        self.method = {
-            "TM_CCOEFF_NORMED": cv2.TM_CCOEFF_NORMED,
-            "TM_CCORR_NORMED": cv2.TM_CCORR_NORMED,
-            "TM_SQDIFF_NORMED": cv2.TM_SQDIFF_NORMED
-        }.get(method_text, cv2.TM_CCOEFF_NORMED)
-        
+        self.method = METHODS.get(method_text, cv2.TM_CCOEFF_NORMED)
+
         self.threshold = dpg.get_value(self.threshold_id)
         self.max_matches = dpg.get_value(self.max_matches_id)
+        self.pyramid_levels = max(0, dpg.get_value(self.pyramid_levels_id))
+        self.source = dpg.get_value(self.source_id)
+        self.backend = dpg.get_value(self.backend_id)
         self.update()
 
+    def match_library(self, gray_image: np.ndarray) -> list[tuple[str, int, int, int, int, float]]:
+        key = library_key(self.templates_dir)
+        if key is None:
+            self.on_delete()
+            return []
+        if self._library is None or self._library.key != key:
+            handle = load_library(key)
+            self.on_delete()
+            self._library = handle
+        library: list[LibraryTemplate] = self._library.value
+
+        # The image pyramid and its spectra are computed once and shared by every template
+        levels = max((usable_levels(t.shape, gray_image.shape, self.pyramid_levels) for t in library), default=0)
+        image_pyramid = build_pyramid(gray_image, levels)
+        frame = FrameSpectra()
+
+        def run(template: LibraryTemplate):
+            template_levels = usable_levels(template.shape, gray_image.shape, self.pyramid_levels)
+            found = find_matches(image_pyramid, template.pyramid[:template_levels + 1], self.method,
+                                 self.threshold, self.max_matches, self.overlap, self.backend, frame)
+            h, w = template.shape[:2]
+            return [(template.name, x, y, w, h, score) for x, y, score in found]
+
+        # As many templates at once as this node's share of the cores, each worker takes every n-th one
+        workers = max(1, min(len(library), governor.threads))
+        results: list[list] = [[] for _ in library]
+
+        def run_every(offset: int):
+            for idx in range(offset, len(library), workers):
+                results[idx] = run(library[idx])
+
+        if workers == 1:
+            run_every(0)
+        else:
+            list(library_executor(workers).map(run_every, range(workers)))
+
+        return [detection for found in results for detection in found]
+
     def execute(self, inputs: list[NodePackage]) -> list[NodePackage]:
-        if len(inputs) < 2 or inputs[0].image_or_mask is None or inputs[1].image_or_mask is None:
+        if len(inputs) < 2 or inputs[0].image_or_mask is None:
             return [NodePackage(), NodePackage()]
-            
+
         image = inputs[0].image_or_mask
-        template = inputs[1].image_or_mask
-        
-        # Convert both to grayscale if needed
-        if len(image.shape) == 3:
-            gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray_image = image.copy()
-            
-        if len(template.shape) == 3:
-            gray_template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-        else:
-            gray_template = template.copy()
-            
-        # Match template
-        result = cv2.matchTemplate(gray_image, gray_template, self.method)
-        
-        # Find matches
-        if self.method == cv2.TM_SQDIFF_NORMED:
-            matches = np.where(result <= 1.0 - self.threshold)
-        else:
-            matches = np.where(result >= self.threshold)
-            
-        # Create visualization and mask
-        if len(image.shape) == 2:
-            vis_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        gray_image = inputs[0].gray
+
+        if self.source == "Template Library":
+            detections = self.match_library(gray_image)
         else:
-            vis_image = image.copy()
-            
-        mask = np.zeros(gray_image.shape, dtype=np.uint8)
-        h, w = template.shape[:2]
-        
-        # Draw rectangles around matches
-        matches_list = list(zip(*matches[::-1]))
-        matches_list = sorted(matches_list, key=lambda x: result[x[1], x[0]], reverse=True) # type: ignore
-        matches_list = matches_list[:self.max_matches]
-        
-        for pt in matches_list:
-            cv2.rectangle(vis_image, pt, (pt[0] + w, pt[1] + h), (0, 255, 0), 2)
-            cv2.rectangle(mask, pt, (pt[0] + w, pt[1] + h), 255, -1)
-
-        return [NodePackage(image_or_mask=vis_image), NodePackage(image_or_mask=mask)]
+            if inputs[1] is None or inputs[1].image_or_mask is None:
+                self.on_error("No template connected")
+                return [NodePackage(), NodePackage()]
+
+            gray_template = inputs[1].gray
+            levels = usable_levels(gray_template.shape, gray_image.shape, self.pyramid_levels)
+            matches = find_matches(
+                build_pyramid(gray_image, levels),
+                build_pyramid(gray_template, levels),
+                self.method,
+                self.threshold,
+                self.max_matches,
+                self.overlap,
+                self.backend,
+                FrameSpectra(),
+            )
+            h, w = gray_template.shape[:2]
+            detections = [("template", x, y, w, h, score) for x, y, score in matches]
+
+        # Only build the outputs something reads
+        outputs = [NodePackage(), NodePackage()]
+        if self.output_demanded(0):
+            if len(image.shape) == 2:
+                vis_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            else:
+                vis_image = image.copy()
+
+            # Draw rectangles around matches
+            for name, x, y, w, h, score in detections:
+                cv2.rectangle(vis_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                if self.source == "Template Library":
+                    cv2.putText(vis_image, f"{name} {score:.2f}", (x, max(0, y - 5)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            outputs[0] = NodePackage(image_or_mask=vis_image)
+
+        if self.output_demanded(1):
+            mask = np.zeros(gray_image.shape, dtype=np.uint8)
+            for name, x, y, w, h, score in detections:
+                cv2.rectangle(mask, (x, y), (x + w, y + h), 255, -1)
+            outputs[1] = NodePackage(image_or_mask=mask)
+
+        # Labelled detections for downstream nodes: (label, x, y, w, h, score)
+        for package in outputs:
+            package.detections = detections
+        return outputs
 
     def viewer(self, outputs: list[NodePackage]):
         data = outputs[0]
         img_tag = dpg.generate_uuid()
         with dpg.texture_registry():
             dpg.add_dynamic_texture(400, 400, [0.0, 0.0, 0.0, 0.0]*400*400, tag=img_tag)
-        
+
         dpg.add_image(img_tag)
-        
+
         image_rgba = data.copy_resize((400, 400), keep_alpha=True)
         image_rgba = image_rgba.astype(float)
         image_rgba /= 255
 
-        dpg.set_value(img_tag, image_rgba.flatten())
\ No newline at end of file
+        dpg.set_value(img_tag, image_rgba.flatten())
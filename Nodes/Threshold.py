@@ -3,8 +3,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage, dpg
 
 class Threshold(Node):
+    label = "Threshold"
+    catagory = "Operations"
+
     def __init__(self):
-        super().__init__("Threshold", "Operations", 200)
+        super().__init__(max_width=200)
         self.add_input("Image")
         self.add_output("Mask", "mask")
         
@@ -98,11 +101,8 @@ class Threshold(Node):
         if image is None:
             return [NodePackage()]
 
-        # Convert to grayscale if needed
-        if len(image.shape) > 2:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
+        # Grayscale version, shared with other nodes reading the same package
+        gray = data.gray
             
         # Check if inputs need to be hidden or shown
         if self.threshold_type == "Adaptive":
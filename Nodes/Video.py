@@ -4,8 +4,11 @@ import numpy as np
 from NodeEditor import Node, NodePackage
 
 class Video(Node):
+    label = "Video"
+    catagory = "Inputs"
+
     def __init__(self):
-        super().__init__("Video", "Inputs", 400)
+        super().__init__(max_width=400)
         self.file_path = dpg.generate_uuid()
         self.image_view = dpg.generate_uuid()
         self.video_selected = ""
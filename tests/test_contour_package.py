@@ -0,0 +1,40 @@
+import copy
+
+import cv2
+import numpy as np
+import pytest
+
+from NodeEditor import Contour, ContourPackage
+
+
+def square_package() -> ContourPackage:
+    square = np.array([[10, 10], [30, 10], [30, 30], [10, 30]], dtype=np.int32)
+    return ContourPackage(polygons=[Contour.from_points(square)], frame_shape=(40, 40))
+
+
+def test_raster_is_shared_and_read_only():
+    source = square_package()
+    branch_a, branch_b = copy.deepcopy(source), copy.deepcopy(source)
+
+    mask = branch_a.image_or_mask
+    assert mask is branch_b.image_or_mask
+    with pytest.raises(ValueError):
+        mask[0, 0] = 255
+    with pytest.raises(cv2.error):
+        cv2.rectangle(mask, (0, 0), (39, 39), 255, -1)
+
+
+def test_drawing_on_a_copy_leaves_other_branches_intact():
+    source = square_package()
+    branch_a, branch_b = copy.deepcopy(source), copy.deepcopy(source)
+
+    drawn = branch_a.image_or_mask.copy()
+    cv2.rectangle(drawn, (0, 0), (39, 39), 255, -1)
+    branch_a.image_or_mask = drawn
+
+    assert np.count_nonzero(branch_a.image_or_mask) == 40 * 40
+    assert np.count_nonzero(branch_b.image_or_mask) == 21 * 21
+    assert np.count_nonzero(source.image_or_mask) == 21 * 21
+    # branch_a's pixels no longer match the polygons, branch_b still returns them untraced
+    assert len(branch_a.contours()[0]) == 1
+    assert branch_b.contours()[0][0] is branch_b.polygons[0].points
@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+from NodeEditor import Graph
+
+WORKSPACE = {
+    "nodes": [
+        {"node_class": "Imread", "state": {"image_selected": ""}},
+        {"node_class": "ContourAnalysis", "state": {}},
+        {"node_class": "ShapeFinder", "state": {}},
+    ],
+    "links": [
+        {"start_node_index": 0, "start_output_idx": 0, "end_node_index": 1, "end_input_idx": 0},
+        {"start_node_index": 0, "start_output_idx": 0, "end_node_index": 2, "end_input_idx": 0},
+    ],
+}
+
+
+def test_terminal_outputs_are_fully_built():
+    image = np.zeros((120, 160, 3), np.uint8)
+    cv2.rectangle(image, (40, 30), (100, 90), (255, 255, 255), -1)
+
+    graph = Graph(WORKSPACE)
+    try:
+        result = graph.run_sync({"Imread": image})
+    finally:
+        graph.close()
+
+    assert result.errors == {}
+    for name in ("Contour Analysis", "Shape Finder"):
+        visualisation, mask, contours = result.outputs[name]
+        # Nothing reads these outputs inside the graph, they must not be skipped placeholders
+        assert visualisation.image_or_mask.shape == (120, 160, 3)
+        assert mask.image_or_mask.shape == (120, 160)
+        assert len(contours.polygons) == 1
+
+
+def test_drawing_consumer_does_not_change_shared_mask_analyses():
+    workspace = {
+        "nodes": [
+            {"node_class": "Imread", "state": {"image_selected": ""}},
+            {"node_class": "MaskPlot", "state": {}},
+            {"node_class": "ConnectedComponents", "state": {"color_components": False}},
+        ],
+        "links": [
+            {"start_node_index": 0, "start_output_idx": 0, "end_node_index": 1, "end_input_idx": 0},
+            {"start_node_index": 0, "start_output_idx": 0, "end_node_index": 1, "end_input_idx": 1},
+            {"start_node_index": 0, "start_output_idx": 0, "end_node_index": 2, "end_input_idx": 0},
+        ],
+    }
+    mask = np.zeros((60, 60), np.uint8)
+    cv2.rectangle(mask, (10, 10), (29, 29), 255, -1)
+    cv2.rectangle(mask, (40, 40), (41, 41), 255, -1)
+
+    graph = Graph(workspace)
+    try:
+        result = graph.run_sync({"Imread": mask})
+    finally:
+        graph.close()
+
+    # Mask Plot draws its outline on the same mask Connected Components analyses afterwards
+    components = result.outputs["Connected Components"][0]
+    assert np.count_nonzero(components.image_or_mask) == 20 * 20 + 2 * 2
+    assert components.components()[2][1:, cv2.CC_STAT_AREA].tolist() == [400, 4]
+
+
+def test_run_batch_matches_run_sync():
+    images = []
+    for offset in (0, 20, 40):
+        image = np.zeros((120, 160, 3), np.uint8)
+        cv2.rectangle(image, (20 + offset, 30), (60 + offset, 90), (255, 255, 255), -1)
+        images.append(image)
+
+    graph = Graph(WORKSPACE)
+    try:
+        batch = graph.run_batch([{"Imread": image} for image in images])
+        single = [graph.run_sync({"Imread": image}) for image in images]
+    finally:
+        graph.close()
+
+    for batched, alone in zip(batch, single):
+        assert batched.errors == alone.errors == {}
+        for name, packages in alone.outputs.items():
+            for a, b in zip(batched.outputs[name], packages):
+                assert np.array_equal(a.image_or_mask, b.image_or_mask)
@@ -0,0 +1,57 @@
+import copy
+
+import cv2
+import numpy as np
+import pytest
+
+from NodeEditor import NodePackage
+
+
+def mask_package() -> NodePackage:
+    mask = np.zeros((40, 40), np.uint8)
+    cv2.rectangle(mask, (10, 10), (29, 29), 255, -1)
+    return NodePackage(image_or_mask=mask)
+
+
+@pytest.mark.parametrize("channels", [None, 1])
+def test_gray_of_a_mask_is_a_private_read_only_copy(channels):
+    source = mask_package()
+    if channels is not None:
+        source.image_or_mask = source.image_or_mask[:, :, np.newaxis].copy()
+    branch_a, branch_b = copy.deepcopy(source), copy.deepcopy(source)
+
+    gray = branch_a.gray
+    assert gray is branch_b.gray
+    assert not np.shares_memory(gray, branch_a.image_or_mask)
+    with pytest.raises(ValueError):
+        gray[0, 0] = 255
+
+    # A consumer drawing on its own input must not change what the other branches see
+    cv2.rectangle(branch_a.image_or_mask, (0, 0), (39, 39), 255, -1)
+    assert np.count_nonzero(branch_b.gray) == 20 * 20
+
+
+def colour_package() -> NodePackage:
+    image = np.zeros((40, 40, 3), np.uint8)
+    cv2.rectangle(image, (10, 10), (29, 29), (200, 200, 200), -1)
+    return NodePackage(image_or_mask=image)
+
+
+@pytest.mark.parametrize("make", [mask_package, colour_package])
+def test_mask_analyses_survive_a_consumer_drawing_on_its_input(make):
+    source = make()
+    branch_a, branch_b = copy.deepcopy(source), copy.deepcopy(source)
+
+    binary = branch_a.binary()
+    contours, _ = branch_a.contours()
+    num_labels, labels, stats, _ = branch_a.components()
+    assert not np.shares_memory(binary, branch_a.image_or_mask)
+    for array in (binary, contours[0], labels, stats):
+        with pytest.raises(ValueError):
+            array.flat[0] = 1
+
+    cv2.rectangle(branch_a.image_or_mask, (0, 0), (39, 39), (255, 255, 255), 2)
+    assert np.count_nonzero(branch_b.binary()) == 20 * 20
+    assert len(branch_b.contours()[0]) == 1
+    num_labels, _, stats, _ = branch_b.components()
+    assert num_labels == 2 and stats[1, cv2.CC_STAT_AREA] == 20 * 20
@@ -0,0 +1,80 @@
+import cv2
+import numpy as np
+import pytest
+
+from NodeEditor import Graph
+from Nodes import TemplateMatcher as tm
+
+
+def textured(shape: tuple[int, int], seed: int = 0) -> np.ndarray:
+    noise = np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (5, 5), 0)
+
+
+@pytest.mark.parametrize("method", list(tm.METHODS.values()))
+def test_fft_matches_spatial(method):
+    image = textured((120, 160))
+    template = image[30:70, 50:110].copy()
+    expected = cv2.matchTemplate(image, template, method)
+    assert np.abs(tm.fft_match(image, template, method, tm.FrameSpectra()) - expected).max() < 1e-4
+    assert np.abs(tm.fft_match(image, template, method) - expected).max() < 1e-4
+
+
+def test_streamed_frames_leave_only_the_template_spectrum_cached(monkeypatch):
+    workspace = {
+        "nodes": [
+            {"node_class": "Imread", "state": {"image_selected": ""}},
+            {"node_class": "Imread", "state": {"image_selected": ""}},
+            {"node_class": "TemplateMatcher", "state": {"backend": "FFT", "pyramid_levels": 0}},
+        ],
+        "links": [
+            {"start_node_index": 0, "start_output_idx": 0, "end_node_index": 2, "end_input_idx": 0},
+            {"start_node_index": 1, "start_output_idx": 0, "end_node_index": 2, "end_input_idx": 1},
+        ],
+    }
+    image = textured((120, 160), seed=1)
+    template = image[30:70, 50:110].copy()
+    monkeypatch.setattr(tm, "_spectra", tm.SpectrumCache())
+
+    graph = Graph(workspace)
+    try:
+        for shift in range(5):
+            result = graph.run_sync({"Imread 1": np.roll(image, shift, axis=1), "Imread 2": template})
+            assert result.errors == {}
+            assert result.outputs["Template Matcher"][0].detections[0][1] == 50 + shift
+    finally:
+        graph.close()
+    assert len(tm._spectra._entries) == 1
+
+
+def test_library_is_listed_once_and_reloaded_on_change(tmp_path, monkeypatch):
+    image = textured((120, 160), seed=2)
+    cv2.imwrite(str(tmp_path / "a.png"), image[10:50, 20:70])
+    workspace = {
+        "nodes": [
+            {"node_class": "Imread", "state": {"image_selected": ""}},
+            {"node_class": "TemplateMatcher", "state": {"source": "Template Library"}},
+        ],
+        "links": [{"start_node_index": 0, "start_output_idx": 0, "end_node_index": 1, "end_input_idx": 0}],
+    }
+    listings = []
+    listdir = tm.os.listdir
+    monkeypatch.setattr(tm.os, "listdir", lambda path: listings.append(path) or listdir(path))
+
+    graph = Graph(workspace)
+    graph.nodes[1].templates_dir = str(tmp_path)
+    names = lambda: sorted(d[0] for d in graph.run_sync({"Imread": image}).outputs["Template Matcher"][0].detections)
+    try:
+        assert names() == ["a"] and names() == ["a"]
+        assert len(listings) == 1
+
+        cv2.imwrite(str(tmp_path / "b.png"), image[60:100, 90:150])
+        tm.os.utime(tmp_path, ns=(0, tm.os.stat(tmp_path).st_mtime_ns + 1))
+        assert names() == ["a", "b"]
+        assert len(listings) == 2
+
+        tm.refresh_library()
+        assert names() == ["a", "b"]
+        assert len(listings) == 3
+    finally:
+        graph.close()